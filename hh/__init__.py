@@ -4,6 +4,18 @@ Headhunter (hh.ru) API wrapper for Python
 from .hh import (
     get_hh_me,
     get_hh_vacancy,
+    get_hh_vacancies,
     get_hh_vacancies_obj,
-    get_hh_short_vacancies
+    get_hh_short_vacancies,
+    iter_hh_vacancies,
+    get_hh_employer,
+    get_hh_employers_obj,
+    enrich_hh_employers
+)
+from .client import (
+    HHClient,
+    HHError,
+    VacancyResult,
+    VacancyIterator,
+    get_client
 )
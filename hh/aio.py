@@ -0,0 +1,326 @@
+import asyncio
+import itertools
+import warnings
+from collections import deque
+from time import perf_counter
+from typing import AsyncIterable, AsyncIterator, Iterable, Optional, Union
+
+import aiohttp
+
+from .cache import get_cache, conditional_headers, endpoint_name
+from .config import Config
+from .dictionaries import Dictionaries
+from .metrics import ParseMetrics, RequestMetrics, get_metrics
+from .parsing import parse_model
+from .ratelimit import get_rate_limiter
+from .singleflight import AsyncSingleFlight
+from .client import (
+    HHError,
+    VacancyResult,
+    RETRY_STATUSES,
+    MAX_PER_PAGE,
+    SEARCH_DEPTH_LIMIT,
+    ENRICH_CHUNK_SIZE,
+    employer_key,
+    retry_delay,
+    attach_employers,
+    page_params,
+    start_page,
+    pages_needed,
+    merge_pages,
+    area_list,
+    harvest_window,
+    split_by_date
+)
+from .schemas import (
+    MeHHSchema,
+    VacancySearchParamsHHSchema,
+    ShortVacancyListHHSchema,
+    VacancyHHSchema,
+    ShortVacancyHHSchema,
+    EmployerSearchParamsHHSchema,
+    ShortEmployerListHHSchema,
+    EmployerHHSchema,
+    EnrichedVacancyHHSchema
+)
+
+
+class AsyncHH:
+    """ Асинхронный клиент api.hh.ru. Количество одновременных запросов ограничено семафором,
+    все запросы делят один пул соединений aiohttp.
+    """
+
+    def __init__(self, conf: Config, concurrency: Optional[int] = None):
+        self.conf = conf
+        self.concurrency = concurrency or conf.max_concurrency
+        self.semaphore = asyncio.Semaphore(self.concurrency)
+        self._session: Optional[aiohttp.ClientSession] = None
+        self.cache = get_cache(conf)
+        self.limiter = get_rate_limiter(conf)
+        self.metrics = get_metrics(conf)
+        self._flight = AsyncSingleFlight()
+        self.dictionaries = Dictionaries(None, path=conf.dictionaries_path, ttl=conf.dictionaries_ttl, fetch_async=self.get_json)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                headers=self.conf.hh_headers,
+                connector=aiohttp.TCPConnector(limit=self.concurrency),
+                timeout=aiohttp.ClientTimeout(sock_connect=self.conf.connect_timeout, sock_read=self.conf.read_timeout),
+                trace_configs=[] if self.metrics is None else [timing_trace_config()]
+            )
+        return self._session
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def get_json(self, path: str) -> dict:
+        return await self._flight.do(path, lambda: self._get_json(path))
+
+    async def _get_json(self, path: str) -> dict:
+        entry = None
+        if self.cache is not None:
+            entry, fresh = self.cache.lookup(path)
+            if fresh:
+                return entry.data
+        if self.metrics is None:
+            return await self._request_json(path, entry)
+        timing = {"start": perf_counter(), "status": None, "retries": 0}
+        try:
+            return await self._request_json(path, entry, timing)
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            timing.update(status=None, received=perf_counter())
+            raise
+        finally:
+            self.metrics.record_request(RequestMetrics(
+                endpoint_name(path),
+                timing["status"],
+                total=timing.get("received", perf_counter()) - timing["start"],
+                ttfb=timing.get("ttfb"),
+                dns=timing.get("dns"),
+                connect=timing.get("connect"),
+                bytes=timing.get("bytes"),
+                json=timing.get("json"),
+                retries=timing["retries"]
+            ))
+
+    async def _request_json(self, path: str, entry, timing: Optional[dict] = None) -> dict:
+        """ Запрос с повторами. В timing, если он передан, записываются замеры для RequestMetrics. """
+        url = f"{self.conf.base_url}{path}"
+        async with self.semaphore:
+            attempt = 0
+            while True:
+                if self.limiter is not None:
+                    await self.limiter.acquire_async()
+                status_code = None
+                try:
+                    async with self.session.get(url, headers=conditional_headers(entry), trace_request_ctx=timing) as response:
+                        status_code = response.status
+                        if timing is not None:
+                            timing.update(status=response.status, retries=attempt, bytes=len(await response.read()), received=perf_counter())
+                        if response.status == 304 and entry is not None:
+                            return self.cache.refresh(path, entry).data
+                        if response.status == 200:
+                            json_dict = await response.json(content_type=None)
+                            if timing is not None:
+                                timing["json"] = perf_counter() - timing["received"]
+                            if self.cache is not None:
+                                self.cache.store(path, json_dict, response.headers.get("ETag"), response.headers.get("Last-Modified"))
+                            return json_dict
+                        if response.status not in RETRY_STATUSES or attempt >= self.conf.max_retries:
+                            raise HHError(response.reason, response.status)
+                        delay = retry_delay(self.conf.backoff_factor, attempt, response.headers.get("Retry-After"))
+                finally:
+                    if self.limiter is not None:
+                        self.limiter.release(status_code)
+                await asyncio.sleep(delay)
+                attempt += 1
+
+    async def get_model(self, schema, path: str):
+        """ Ответ эндпоинта path, разобранный в schema в режиме conf.parse_mode. """
+        json_dict = await self.get_json(path)
+        if self.metrics is None:
+            return parse_model(schema, json_dict, self.conf.parse_mode)
+        start = perf_counter()
+        model = parse_model(schema, json_dict, self.conf.parse_mode)
+        self.metrics.record_parse(ParseMetrics(endpoint_name(path), schema.__name__, perf_counter() - start))
+        return model
+
+    async def get_me(self) -> MeHHSchema:
+        return await self.get_model(MeHHSchema, "/me")
+
+    async def get_vacancies_obj(self, params: VacancySearchParamsHHSchema) -> ShortVacancyListHHSchema:
+        return await self.get_model(ShortVacancyListHHSchema, f"/vacancies{params.get_params()}")
+
+    async def get_short_vacancies(self, params: VacancySearchParamsHHSchema, limit=20) -> list[ShortVacancyHHSchema]:
+        if limit <= 0:
+            return []
+        start, per_page = start_page(params, limit)
+        first = await self.get_vacancies_obj(params=page_params(params, start, per_page))
+        rest = await asyncio.gather(*[
+            self.get_vacancies_obj(params=page_params(params, page, per_page))
+            for page in pages_needed(first, per_page, limit, start)
+        ])
+        return merge_pages([first, *rest], limit)
+
+    async def get_vacancy(self, vacancy_id: str) -> VacancyHHSchema:
+        return await self.get_model(VacancyHHSchema, f"/vacancies/{vacancy_id}")
+
+    async def get_vacancies(self, vacancy_ids: Iterable[str], workers: Optional[int] = None,
+                            ordered=False) -> AsyncIterator[VacancyResult]:
+        """ Асинхронный аналог HHClient.get_vacancies: в работе одновременно не больше workers вакансий. """
+        workers = workers or self.concurrency
+        vacancy_ids = iter(vacancy_ids)
+        pending = deque(asyncio.create_task(self._fetch_vacancy(vacancy_id)) for vacancy_id in itertools.islice(vacancy_ids, workers))
+        try:
+            while pending:
+                if ordered:
+                    task = pending.popleft()
+                    await asyncio.wait([task])
+                else:
+                    done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                    task = done.pop()
+                    pending.remove(task)
+                for vacancy_id in itertools.islice(vacancy_ids, 1):
+                    pending.append(asyncio.create_task(self._fetch_vacancy(vacancy_id)))
+                yield task.result()
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def _fetch_vacancy(self, vacancy_id: str) -> VacancyResult:
+        try:
+            return VacancyResult(id=vacancy_id, vacancy=await self.get_vacancy(vacancy_id))
+        except (ValueError, aiohttp.ClientError, asyncio.TimeoutError) as error:
+            return VacancyResult(id=vacancy_id, error=error)
+
+    async def get_employers_obj(self, params: EmployerSearchParamsHHSchema) -> ShortEmployerListHHSchema:
+        return await self.get_model(ShortEmployerListHHSchema, f"/employers{params.get_params()}")
+
+    async def get_employer(self, employer_id: str) -> EmployerHHSchema:
+        return await self.get_model(EmployerHHSchema, f"/employers/{employer_id}")
+
+    async def enrich_employers(self, vacancies: Union[Iterable[ShortVacancyHHSchema], AsyncIterable[ShortVacancyHHSchema]],
+                               chunk_size=ENRICH_CHUNK_SIZE) -> AsyncIterator[EnrichedVacancyHHSchema]:
+        """ Асинхронный аналог HHClient.enrich_employers. vacancies может быть и асинхронным итератором,
+        например harvest_vacancies; одновременные загрузки ограничены семафором клиента.
+        """
+        employers: dict[str, asyncio.Task] = {}
+        try:
+            chunk = []
+            async for vacancy in aiter_items(vacancies):
+                employer_id = employer_key(vacancy)
+                if employer_id is not None and employer_id not in employers:
+                    employers[employer_id] = asyncio.create_task(self._fetch_employer(employer_id))
+                chunk.append(vacancy)
+                if len(chunk) >= chunk_size:
+                    for enriched in await self._attach_employers(chunk, employers):
+                        yield enriched
+                    chunk = []
+            for enriched in await self._attach_employers(chunk, employers):
+                yield enriched
+        finally:
+            for task in employers.values():
+                task.cancel()
+
+    async def _attach_employers(self, vacancies: list[ShortVacancyHHSchema], employers: dict[str, asyncio.Task]) -> list[EnrichedVacancyHHSchema]:
+        tasks = {employers[employer_id] for employer_id in map(employer_key, vacancies) if employer_id is not None}
+        if tasks:
+            await asyncio.wait(tasks)
+        return attach_employers(vacancies, employers)
+
+    async def _fetch_employer(self, employer_id: str) -> Optional[EmployerHHSchema]:
+        try:
+            return await self.get_employer(employer_id)
+        except (ValueError, aiohttp.ClientError, asyncio.TimeoutError):
+            return None
+
+    async def get_area_children(self, area_id: Optional[str]) -> list[str]:
+        await self.dictionaries.load_async(names=("areas",))
+        return self.dictionaries.area_children(area_id)
+
+    async def harvest_vacancies(self, params: VacancySearchParamsHHSchema) -> AsyncIterator[ShortVacancyHHSchema]:
+        """ Асинхронный аналог HHClient.harvest_vacancies. """
+        seen = set()
+        tasks = {asyncio.create_task(self._harvest_probe(harvest_window(params)))}
+        try:
+            while tasks:
+                done, tasks = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    items, queries, pages = task.result()
+                    tasks.update(asyncio.create_task(self._harvest_probe(query)) for query in queries)
+                    tasks.update(asyncio.create_task(self._harvest_page(page)) for page in pages)
+                    for item in items:
+                        if item.id not in seen:
+                            seen.add(item.id)
+                            yield item
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def _harvest_probe(self, query: VacancySearchParamsHHSchema):
+        first = await self.get_vacancies_obj(params=page_params(query, 0, MAX_PER_PAGE))
+        if first.found > SEARCH_DEPTH_LIMIT:
+            queries = split_by_date(query)
+            if queries is None:
+                queries = [query.copy(update={"area": area}) for area in await self._split_areas(query)]
+            if queries:
+                return [], queries, []
+            warnings.warn(f"Найдено {first.found} вакансий, выдача по запросу {query.get_params()} будет неполной")
+        pages = [page_params(query, page, MAX_PER_PAGE) for page in pages_needed(first, MAX_PER_PAGE, SEARCH_DEPTH_LIMIT)]
+        return first.items, [], pages
+
+    async def _harvest_page(self, query: VacancySearchParamsHHSchema):
+        return (await self.get_vacancies_obj(params=query)).items, [], []
+
+    async def _split_areas(self, query: VacancySearchParamsHHSchema) -> list[str]:
+        areas = area_list(query.area)
+        if len(areas) > 1:
+            return areas
+        return await self.get_area_children(areas[0] if areas else None)
+
+
+async def aiter_items(items: Union[Iterable, AsyncIterable]) -> AsyncIterator:
+    if hasattr(items, "__aiter__"):
+        async for item in items:
+            yield item
+    else:
+        for item in items:
+            yield item
+
+
+def timing_trace_config() -> aiohttp.TraceConfig:
+    """ Трассировка aiohttp, которая пишет время DNS, установки соединения и до заголовков ответа
+    в словарь, переданный в запрос как trace_request_ctx.
+    """
+
+    def started(name: str):
+        async def handler(session, context, params):
+            setattr(context, name, perf_counter())
+        return handler
+
+    def finished(name: str, key: str, accumulate=True):
+        async def handler(session, context, params):
+            timing = context.trace_request_ctx
+            if timing is not None:
+                elapsed = perf_counter() - getattr(context, name)
+                timing[key] = (timing.get(key) or 0.0) + elapsed if accumulate else elapsed
+        return handler
+
+    trace = aiohttp.TraceConfig()
+    trace.on_dns_resolvehost_start.append(started("dns_started"))
+    trace.on_dns_resolvehost_end.append(finished("dns_started", "dns"))
+    trace.on_connection_create_start.append(started("connect_started"))
+    trace.on_connection_create_end.append(finished("connect_started", "connect"))
+    trace.on_request_start.append(started("request_started"))
+    trace.on_request_end.append(finished("request_started", "ttfb", accumulate=False))
+    return trace
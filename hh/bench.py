@@ -0,0 +1,148 @@
+""" Бенчмарк клиента на локальной замене api.hh.ru (fake_server.FakeHHServer).
+
+    python -m hh.bench --latency 0.02 --vacancies 2000 --details 500
+
+Для каждого сценария (поиск, пагинация, пакетная загрузка описаний) выводит запросы в секунду,
+p50/p99 задержки HTTP-запроса и пиковую память, а также время разбора одной вакансии в каждом
+режиме parse_model.
+"""
+import argparse
+import math
+import time
+import tracemalloc
+from typing import Callable, NamedTuple, Optional
+
+from .client import HHClient
+from .config import Config
+from .fake_server import FakeHHServer
+from .parsing import PARSE_MODES, parse_model
+from .schemas import ShortVacancyListHHSchema, VacancySearchParamsHHSchema
+
+
+class BenchResult(NamedTuple):
+    name: str
+    requests: int
+    items: int
+    seconds: float
+    latencies: list
+    peak_memory: Optional[int]
+
+    @property
+    def requests_per_second(self) -> float:
+        return self.requests / self.seconds if self.seconds else 0.0
+
+    def row(self) -> str:
+        memory = "-" if self.peak_memory is None else f"{self.peak_memory / 2 ** 20:.1f}"
+        return (f"{self.name:<12} {self.requests:>8} {self.items:>8} {self.seconds:>8.2f} {self.requests_per_second:>9.1f} "
+                f"{percentile(self.latencies, 50) * 1000:>8.1f} {percentile(self.latencies, 99) * 1000:>8.1f} {memory:>8}")
+
+
+HEADER = f"{'scenario':<12} {'requests':>8} {'items':>8} {'seconds':>8} {'req/s':>9} {'p50 ms':>8} {'p99 ms':>8} {'peak MiB':>8}"
+
+
+def percentile(values: list, q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, math.ceil(q / 100 * len(ordered)) - 1))]
+
+
+class TimedClient(HHClient):
+    """ Клиент, записывающий длительность каждого HTTP-запроса. """
+
+    def __init__(self, conf: Config):
+        super().__init__(conf)
+        self.latencies = []
+
+    def _send(self, url: str, headers: dict):
+        start = time.perf_counter()
+        try:
+            return super()._send(url, headers)
+        finally:
+            self.latencies.append(time.perf_counter() - start)
+
+
+def search(client: HHClient, pages: int) -> int:
+    params = VacancySearchParamsHHSchema(text="python", per_page=100)
+    return sum(len(client.get_vacancies_obj(params.copy(update={"page": page % 20})).items) for page in range(pages))
+
+
+def pagination(client: HHClient, limit: int) -> int:
+    return len(client.get_short_vacancies(VacancySearchParamsHHSchema(text="python"), limit=limit))
+
+
+def bulk_details(client: HHClient, vacancy_ids: list[str], workers: int) -> int:
+    return sum(result.vacancy is not None for result in client.get_vacancies(vacancy_ids, workers=workers))
+
+
+def run_scenario(name: str, fake: FakeHHServer, conf: Config, scenario: Callable[[HHClient], int], memory=True) -> BenchResult:
+    client = TimedClient(conf)
+    requests_before = fake.requests
+    start = time.perf_counter()
+    items = scenario(client)
+    seconds = time.perf_counter() - start
+    client.close()
+    result = BenchResult(name, fake.requests - requests_before, items, seconds, client.latencies, None)
+    if memory:
+        # tracemalloc заметно замедляет работу, поэтому память меряется отдельным прогоном
+        client = TimedClient(conf)
+        tracemalloc.start()
+        scenario(client)
+        result = result._replace(peak_memory=tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+        client.close()
+    return result
+
+
+def parse_time_per_item(page: dict, repeat=10) -> dict[str, float]:
+    """ Среднее время разбора одной вакансии страницы поиска в каждом режиме, секунды. """
+    per_item = {}
+    for mode in PARSE_MODES:
+        start = time.perf_counter()
+        for _ in range(repeat):
+            for vacancy in parse_model(ShortVacancyListHHSchema, page, mode).items:
+                vacancy.salary
+        per_item[mode] = (time.perf_counter() - start) / (repeat * len(page["items"]))
+    return per_item
+
+
+def run(latency=0.005, vacancies=2000, details=500, workers=20, memory=True,
+        fake: Optional[FakeHHServer] = None) -> tuple[list[BenchResult], dict[str, float]]:
+    own_fake = fake is None
+    if own_fake:
+        fake = FakeHHServer(found=max(vacancies, details), latency=latency, seed=0).start()
+    try:
+        conf = Config(base_url=fake.base_url, token="bench", max_concurrency=workers)
+        vacancy_ids = [fake.vacancy_id(index) for index in range(details)]
+        results = [
+            run_scenario("search", fake, conf, lambda client: search(client, max(1, vacancies // 100)), memory),
+            run_scenario("pagination", fake, conf, lambda client: pagination(client, vacancies), memory),
+            run_scenario("bulk_details", fake, conf, lambda client: bulk_details(client, vacancy_ids, workers), memory)
+        ]
+        with HHClient(conf) as client:
+            page = client.get_json("/vacancies?per_page=100&page=0")
+        return results, parse_time_per_item(page)
+    finally:
+        if own_fake:
+            fake.stop()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Бенчмарк hh на локальной замене api.hh.ru")
+    parser.add_argument("--latency", type=float, default=0.005, help="задержка ответа сервера, секунды")
+    parser.add_argument("--vacancies", type=int, default=2000, help="вакансий в сценариях поиска и пагинации")
+    parser.add_argument("--details", type=int, default=500, help="вакансий в сценарии пакетной загрузки описаний")
+    parser.add_argument("--workers", type=int, default=20, help="ширина пула соединений и потоков")
+    parser.add_argument("--no-memory", action="store_true", help="не измерять пиковую память")
+    args = parser.parse_args(argv)
+    results, parse_times = run(args.latency, args.vacancies, args.details, args.workers, memory=not args.no_memory)
+    print(HEADER)
+    for result in results:
+        print(result.row())
+    print()
+    for mode, seconds in parse_times.items():
+        print(f"parse {mode:<10} {seconds * 1e6:>8.1f} us/item")
+
+
+if __name__ == "__main__":
+    main()
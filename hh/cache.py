@@ -0,0 +1,155 @@
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import NamedTuple, Optional
+
+from .config import Config
+
+DEFAULT_TTL = {
+    "vacancies": 300,
+    "vacancies/{id}": 3600,
+    "employers": 3600,
+    "employers/{id}": 86400
+}
+
+
+class CacheEntry(NamedTuple):
+    data: object
+    etag: Optional[str]
+    last_modified: Optional[str]
+    stored_at: float
+
+
+def endpoint_name(path: str) -> str:
+    """ Имя эндпоинта для выбора TTL: /vacancies?text=... -> vacancies, /vacancies/123 -> vacancies/{id}. """
+    segments = path.split("?", 1)[0].strip("/").split("/")
+    return "/".join(segments[:1] + ["{id}" if segment.isdigit() else segment for segment in segments[1:]])
+
+
+class ResponseCache:
+    """ Кэш ответов api.hh.ru: LRU в памяти перед хранилищем SQLite. Кэшируются только эндпоинты,
+    для которых задан TTL. Устаревшая запись с ETag или Last-Modified не удаляется, а используется
+    для условного запроса - если ответ 304, она снова считается свежей.
+    """
+
+    def __init__(self, path: Optional[str] = None, memory_size=1024, ttl: Optional[dict[str, float]] = None):
+        self.memory_size = memory_size
+        self.ttl = DEFAULT_TTL if ttl is None else ttl
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+        self.revalidated = 0
+        self.evictions = 0
+        self._memory: OrderedDict[str, CacheEntry] = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        if path is not None:
+            self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "path TEXT PRIMARY KEY, data TEXT NOT NULL, etag TEXT, last_modified TEXT, stored_at REAL NOT NULL)"
+            )
+
+    def ttl_for(self, path: str) -> Optional[float]:
+        return self.ttl.get(endpoint_name(path))
+
+    def lookup(self, path: str) -> tuple[Optional[CacheEntry], bool]:
+        """ Возвращает запись и признак её свежести. Пустая запись означает промах. """
+        ttl = self.ttl_for(path)
+        if ttl is None:
+            return None, False
+        with self._lock:
+            entry = self._memory.get(path)
+            if entry is not None:
+                self._memory.move_to_end(path)
+            elif self._db is not None:
+                row = self._db.execute(
+                    "SELECT data, etag, last_modified, stored_at FROM responses WHERE path = ?", (path,)
+                ).fetchone()
+                if row is not None:
+                    entry = CacheEntry(json.loads(row[0]), row[1], row[2], row[3])
+                    self._remember(path, entry)
+            if entry is None:
+                self.misses += 1
+                return None, False
+            if time.time() - entry.stored_at < ttl:
+                self.hits += 1
+                return entry, True
+            self.stale += 1
+            return entry, False
+
+    def store(self, path: str, data, etag: Optional[str] = None, last_modified: Optional[str] = None):
+        if self.ttl_for(path) is None:
+            return
+        entry = CacheEntry(data, etag, last_modified, time.time())
+        with self._lock:
+            self._remember(path, entry)
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO responses (path, data, etag, last_modified, stored_at) VALUES (?, ?, ?, ?, ?)",
+                    (path, json.dumps(data, ensure_ascii=False), etag, last_modified, entry.stored_at)
+                )
+
+    def refresh(self, path: str, entry: CacheEntry) -> CacheEntry:
+        """ Продлевает запись после ответа 304. """
+        entry = entry._replace(stored_at=time.time())
+        with self._lock:
+            self.revalidated += 1
+            self._remember(path, entry)
+            if self._db is not None:
+                self._db.execute("UPDATE responses SET stored_at = ? WHERE path = ?", (entry.stored_at, path))
+        return entry
+
+    def _remember(self, path: str, entry: CacheEntry):
+        self._memory[path] = entry
+        self._memory.move_to_end(path)
+        while len(self._memory) > self.memory_size:
+            self._memory.popitem(last=False)
+            self.evictions += 1
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "stale": self.stale,
+            "revalidated": self.revalidated,
+            "evictions": self.evictions,
+            "memory_size": len(self._memory)
+        }
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM responses")
+
+    def close(self):
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+
+def conditional_headers(entry: Optional[CacheEntry]) -> dict[str, str]:
+    headers = {}
+    if entry is not None:
+        if entry.etag:
+            headers["If-None-Match"] = entry.etag
+        if entry.last_modified:
+            headers["If-Modified-Since"] = entry.last_modified
+    return headers
+
+
+_cache_lock = threading.Lock()
+
+
+def get_cache(conf: Config) -> Optional[ResponseCache]:
+    """ Кэш, закреплённый за конфигом, или None, если кэширование выключено. """
+    if not conf.cache_enabled:
+        return None
+    with _cache_lock:
+        if conf._cache is None:
+            conf._cache = ResponseCache(path=conf.cache_path, memory_size=conf.cache_memory_size, ttl=conf.cache_ttl)
+        return conf._cache
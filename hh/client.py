@@ -0,0 +1,484 @@
+import itertools
+import math
+import threading
+import warnings
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor, wait, FIRST_COMPLETED
+from datetime import date, datetime, time, timedelta
+from time import perf_counter, sleep
+from typing import Iterable, Iterator, NamedTuple, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from .cache import get_cache, conditional_headers, endpoint_name
+from .config import Config
+from .dictionaries import Dictionaries
+from .metrics import ParseMetrics, RequestMetrics, TimedHTTPAdapter, connect_seconds, get_metrics, start_connect_timer
+from .parsing import parse_model
+from .ratelimit import get_rate_limiter
+from .singleflight import SingleFlight
+from .schemas import (
+    MeHHSchema,
+    VacancySearchParamsHHSchema,
+    ShortVacancyListHHSchema,
+    VacancyHHSchema,
+    ShortVacancyHHSchema,
+    EmployerSearchParamsHHSchema,
+    ShortEmployerListHHSchema,
+    EmployerHHSchema,
+    EnrichedVacancyHHSchema
+)
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+MAX_PER_PAGE = 100
+DEFAULT_PER_PAGE = 20
+SEARCH_DEPTH_LIMIT = 2000
+DEFAULT_SEARCH_PERIOD = 30
+MIN_HARVEST_WINDOW = timedelta(days=1)
+MIN_HARVEST_DATETIME_WINDOW = timedelta(minutes=10)
+ENRICH_CHUNK_SIZE = 500
+
+
+class HHError(ValueError):
+    """ Ошибка ответа api.hh.ru. Наследуется от ValueError, чтобы не ломать существующие обработчики. """
+
+    def __init__(self, reason: str, status_code: int = None):
+        super().__init__(reason)
+        self.reason = reason
+        self.status_code = status_code
+
+
+class VacancyResult(NamedTuple):
+    """ Результат загрузки одной вакансии в пакетном режиме: либо vacancy, либо error. """
+    id: str
+    vacancy: Optional[VacancyHHSchema] = None
+    error: Optional[Exception] = None
+
+
+class HHClient:
+    """ Клиент api.hh.ru с пулом keep-alive соединений, таймаутами и повторами на 429/5xx. """
+
+    def __init__(self, conf: Config):
+        self.conf = conf
+        self.timeout = (conf.connect_timeout, conf.read_timeout)
+        self.session = requests.Session()
+        self.session.headers.update(conf.hh_headers)
+        self.limiter = get_rate_limiter(conf)
+        # с ограничителем повторы ответов 429/5xx делает _send, чтобы каждая попытка занимала слот и токен
+        limited = self.limiter is not None
+        retry = Retry(
+            total=conf.max_retries,
+            backoff_factor=conf.backoff_factor,
+            status_forcelist=() if limited else RETRY_STATUSES,
+            allowed_methods=frozenset(["GET"]),
+            respect_retry_after_header=not limited,
+            raise_on_status=False
+        )
+        self.metrics = get_metrics(conf)
+        adapter_class = HTTPAdapter if self.metrics is None else TimedHTTPAdapter
+        # потоки get_short_vacancies, get_vacancies и harvest_vacancies не должны вытеснять соединения из пула
+        self.pool_size = max(conf.pool_size, conf.max_concurrency)
+        adapter = adapter_class(pool_connections=self.pool_size, pool_maxsize=self.pool_size, max_retries=retry)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.cache = get_cache(conf)
+        self._flight = SingleFlight()
+        self.dictionaries = Dictionaries(self.get_json, path=conf.dictionaries_path, ttl=conf.dictionaries_ttl)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.session.close()
+
+    def get_json(self, path: str) -> dict:
+        """ Ответ эндпоинта path. Одновременные запросы одного и того же path выполняются один раз. """
+        return self._flight.do(path, lambda: self._get_json(path))
+
+    def _get_json(self, path: str) -> dict:
+        entry = None
+        if self.cache is not None:
+            entry, fresh = self.cache.lookup(path)
+            if fresh:
+                return entry.data
+        if self.metrics is not None:
+            return self._get_json_measured(path, entry)
+        response = self._send(f"{self.conf.base_url}{path}", conditional_headers(entry))
+        return self._read_json(path, entry, response)
+
+    def _get_json_measured(self, path: str, entry) -> dict:
+        endpoint = endpoint_name(path)
+        start_connect_timer()
+        start = perf_counter()
+        try:
+            response = self._send(f"{self.conf.base_url}{path}", conditional_headers(entry))
+        except requests.RequestException:
+            self.metrics.record_request(RequestMetrics(endpoint, None, perf_counter() - start, connect=connect_seconds()))
+            raise
+        received = perf_counter()
+        json_dict = response.json() if response.status_code == 200 else None
+        decoded = perf_counter()
+        self.metrics.record_request(RequestMetrics(
+            endpoint,
+            response.status_code,
+            total=received - start,
+            ttfb=response.elapsed.total_seconds(),
+            connect=connect_seconds(),
+            bytes=len(response.content),
+            json=None if json_dict is None else decoded - received,
+            retries=retry_count(response)
+        ))
+        return self._read_json(path, entry, response, json_dict)
+
+    def _read_json(self, path: str, entry, response: requests.Response, json_dict: Optional[dict] = None) -> dict:
+        if response.status_code == 304 and entry is not None:
+            return self.cache.refresh(path, entry).data
+        if response.status_code != 200:
+            raise HHError(response.reason, response.status_code)
+        if json_dict is None:
+            json_dict = response.json()
+        if self.cache is not None:
+            self.cache.store(path, json_dict, response.headers.get("ETag"), response.headers.get("Last-Modified"))
+        return json_dict
+
+    def _send(self, url: str, headers: dict) -> requests.Response:
+        if self.limiter is None:
+            return self.session.get(url, headers=headers, timeout=self.timeout)
+        attempt = 0
+        while True:
+            self.limiter.acquire()
+            status_code = None
+            try:
+                response = self.session.get(url, headers=headers, timeout=self.timeout)
+                status_code = response.status_code
+            finally:
+                self.limiter.release(status_code)
+            if status_code not in RETRY_STATUSES or attempt >= self.conf.max_retries:
+                response.hh_retries = attempt
+                return response
+            response.close()
+            sleep(retry_delay(self.conf.backoff_factor, attempt, response.headers.get("Retry-After")))
+            attempt += 1
+
+    def get_model(self, schema, path: str):
+        """ Ответ эндпоинта path, разобранный в schema в режиме conf.parse_mode. """
+        json_dict = self.get_json(path)
+        if self.metrics is None:
+            return parse_model(schema, json_dict, self.conf.parse_mode)
+        start = perf_counter()
+        model = parse_model(schema, json_dict, self.conf.parse_mode)
+        self.metrics.record_parse(ParseMetrics(endpoint_name(path), schema.__name__, perf_counter() - start))
+        return model
+
+    def get_me(self) -> MeHHSchema:
+        return self.get_model(MeHHSchema, "/me")
+
+    def get_vacancies_obj(self, params: VacancySearchParamsHHSchema) -> ShortVacancyListHHSchema:
+        return self.get_model(ShortVacancyListHHSchema, f"/vacancies{params.get_params()}")
+
+    def get_short_vacancies(self, params: VacancySearchParamsHHSchema, limit=20) -> list[ShortVacancyHHSchema]:
+        """ Возвращает до limit вакансий, начиная со страницы params.page (в пределах SEARCH_DEPTH_LIMIT).
+        Первая страница запрашивается сразу, остальные - параллельно, после того как из первого ответа
+        стало известно количество страниц.
+        """
+        if limit <= 0:
+            return []
+        start, per_page = start_page(params, limit)
+        first = self.get_vacancies_obj(params=page_params(params, start, per_page))
+        pages = pages_needed(first, per_page, limit, start)
+        if len(pages) == 0:
+            return merge_pages([first], limit)
+        with ThreadPoolExecutor(max_workers=min(len(pages), self.conf.max_concurrency)) as executor:
+            rest = executor.map(lambda page: self.get_vacancies_obj(params=page_params(params, page, per_page)), pages)
+            return merge_pages([first, *rest], limit)
+
+    def get_vacancy(self, vacancy_id: str) -> VacancyHHSchema:
+        return self.get_model(VacancyHHSchema, f"/vacancies/{vacancy_id}")
+
+    def iter_vacancies(self, params: VacancySearchParamsHHSchema, page=0, index=0,
+                       per_page=MAX_PER_PAGE) -> "VacancyIterator":
+        return VacancyIterator(self, params, page=page, index=index, per_page=per_page)
+
+    def get_vacancies(self, vacancy_ids: Iterable[str], workers: Optional[int] = None,
+                      ordered=False) -> Iterator[VacancyResult]:
+        """ Загружает вакансии по списку id пулом из workers потоков (не больше пула соединений).
+        Результаты отдаются по мере готовности, а при ordered=True - в порядке vacancy_ids. Ошибка по
+        отдельной вакансии (например, 404 для архивной) попадает в VacancyResult.error и не прерывает
+        остальную загрузку.
+        """
+        workers = min(workers or self.conf.max_concurrency, self.pool_size)
+        vacancy_ids = iter(vacancy_ids)
+        executor = ThreadPoolExecutor(max_workers=workers)
+        try:
+            pending = deque(executor.submit(self._fetch_vacancy, vacancy_id) for vacancy_id in itertools.islice(vacancy_ids, workers * 2))
+            while pending:
+                if ordered:
+                    future = pending.popleft()
+                else:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    future = done.pop()
+                    pending.remove(future)
+                for vacancy_id in itertools.islice(vacancy_ids, 1):
+                    pending.append(executor.submit(self._fetch_vacancy, vacancy_id))
+                yield future.result()
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def _fetch_vacancy(self, vacancy_id: str) -> VacancyResult:
+        try:
+            return VacancyResult(id=vacancy_id, vacancy=self.get_vacancy(vacancy_id))
+        except (ValueError, requests.RequestException) as error:
+            return VacancyResult(id=vacancy_id, error=error)
+
+    def get_employers_obj(self, params: EmployerSearchParamsHHSchema) -> ShortEmployerListHHSchema:
+        return self.get_model(ShortEmployerListHHSchema, f"/employers{params.get_params()}")
+
+    def get_employer(self, employer_id: str) -> EmployerHHSchema:
+        return self.get_model(EmployerHHSchema, f"/employers/{employer_id}")
+
+    def enrich_employers(self, vacancies: Iterable[ShortVacancyHHSchema], workers: Optional[int] = None,
+                         chunk_size=ENRICH_CHUNK_SIZE) -> Iterator[EnrichedVacancyHHSchema]:
+        """ Отдаёт копии вакансий (EnrichedVacancyHHSchema) с полным описанием работодателя в employer,
+        в исходном порядке, порциями по chunk_size; переданные вакансии не меняются. Каждый работодатель
+        запрашивается один раз: загрузка нового работодателя запускается в пуле из workers потоков, как
+        только он встретился в потоке вакансий, и её результат используется для всех его вакансий. Если
+        работодателя загрузить не удалось (например, 404), у вакансии остаётся короткое описание.
+        """
+        employers: dict[str, Future] = {}
+        executor = ThreadPoolExecutor(max_workers=min(workers or self.conf.max_concurrency, self.pool_size))
+        try:
+            chunk = []
+            for vacancy in vacancies:
+                employer_id = employer_key(vacancy)
+                if employer_id is not None and employer_id not in employers:
+                    employers[employer_id] = executor.submit(self._fetch_employer, employer_id)
+                chunk.append(vacancy)
+                if len(chunk) >= chunk_size:
+                    yield from attach_employers(chunk, employers)
+                    chunk = []
+            yield from attach_employers(chunk, employers)
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def _fetch_employer(self, employer_id: str) -> Optional[EmployerHHSchema]:
+        try:
+            return self.get_employer(employer_id)
+        except (ValueError, requests.RequestException):
+            return None
+
+    def get_area_children(self, area_id: Optional[str]) -> list[str]:
+        return self.dictionaries.area_children(area_id)
+
+    def harvest_vacancies(self, params: VacancySearchParamsHHSchema) -> Iterator[ShortVacancyHHSchema]:
+        """ Выгружает всю выдачу поиска, обходя ограничение глубины в SEARCH_DEPTH_LIMIT вакансий.
+        Запрос, в котором найдено больше, делится пополам по date_from/date_to, а когда окно сужено
+        до одного дня - по дочерним регионам area. Подзапросы выполняются параллельно, вакансии
+        отдаются по мере получения, без повторов.
+        """
+        seen = set()
+        executor = ThreadPoolExecutor(max_workers=self.conf.max_concurrency)
+        try:
+            futures = {executor.submit(self._harvest_probe, harvest_window(params))}
+            while futures:
+                done, futures = wait(futures, return_when=FIRST_COMPLETED)
+                for future in done:
+                    items, queries, pages = future.result()
+                    futures.update(executor.submit(self._harvest_probe, query) for query in queries)
+                    futures.update(executor.submit(self._harvest_page, page) for page in pages)
+                    for item in items:
+                        if item.id not in seen:
+                            seen.add(item.id)
+                            yield item
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def _harvest_probe(self, query: VacancySearchParamsHHSchema):
+        first = self.get_vacancies_obj(params=page_params(query, 0, MAX_PER_PAGE))
+        if first.found > SEARCH_DEPTH_LIMIT:
+            queries = split_by_date(query)
+            if queries is None:
+                queries = [query.copy(update={"area": area}) for area in self._split_areas(query)]
+            if queries:
+                return [], queries, []
+            warnings.warn(f"Найдено {first.found} вакансий, выдача по запросу {query.get_params()} будет неполной")
+        pages = [page_params(query, page, MAX_PER_PAGE) for page in pages_needed(first, MAX_PER_PAGE, SEARCH_DEPTH_LIMIT)]
+        return first.items, [], pages
+
+    def _harvest_page(self, query: VacancySearchParamsHHSchema):
+        return self.get_vacancies_obj(params=query).items, [], []
+
+    def _split_areas(self, query: VacancySearchParamsHHSchema) -> list[str]:
+        areas = area_list(query.area)
+        if len(areas) > 1:
+            return areas
+        return self.get_area_children(areas[0] if areas else None)
+
+
+class VacancyIterator:
+    """ Постраничный обход выдачи поиска по одной вакансии. Следующая страница загружается в фоне,
+    пока обрабатывается текущая, поэтому в памяти не больше двух страниц. Позиция (page, index)
+    указывает на первую ещё не отданную вакансию: iter_vacancies(params, page=..., index=...)
+    продолжит обход с неё. Обход ограничен глубиной SEARCH_DEPTH_LIMIT.
+    """
+
+    def __init__(self, client: HHClient, params: VacancySearchParamsHHSchema, page=0, index=0, per_page=MAX_PER_PAGE):
+        self.client = client
+        self.params = params
+        self.per_page = per_page
+        self.page = page
+        self.index = index
+        self._items: Optional[list[ShortVacancyHHSchema]] = None
+        self._last_page: Optional[int] = None
+        self._executor = ThreadPoolExecutor(max_workers=1)
+        self._next = self._prefetch(page)
+
+    def __iter__(self):
+        return self
+
+    def __next__(self) -> ShortVacancyHHSchema:
+        if self._executor is None:
+            raise StopIteration
+        while self._items is None or self.index >= len(self._items):
+            if self._items is not None:
+                self.page += 1
+                self.index = 0
+            if self._next is None:
+                self.close()
+                raise StopIteration
+            result = self._next.result()
+            self._items = result.items
+            self._last_page = min(result.pages, math.ceil(SEARCH_DEPTH_LIMIT / self.per_page)) - 1
+            self._next = self._prefetch(self.page + 1)
+        item = self._items[self.index]
+        self.index += 1
+        return item
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _prefetch(self, page: int):
+        if self._last_page is not None and page > self._last_page:
+            return None
+        return self._executor.submit(self.client.get_vacancies_obj, page_params(self.params, page, self.per_page))
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+        self._next = None
+
+
+def retry_count(response: requests.Response) -> int:
+    """ Сколько раз запрос повторялся перед получением response: urllib3 или HHClient._send. """
+    retries = getattr(response.raw, "retries", None)
+    return getattr(response, "hh_retries", 0) + (0 if retries is None else len(retries.history))
+
+
+def retry_delay(backoff_factor: float, attempt: int, retry_after: Optional[str]) -> float:
+    """ Пауза перед повтором: Retry-After ответа в секундах, иначе экспоненциальная задержка. """
+    if retry_after is not None and retry_after.isdigit():
+        return float(retry_after)
+    return backoff_factor * (2 ** attempt)
+
+
+def employer_key(vacancy: ShortVacancyHHSchema) -> Optional[str]:
+    """ id работодателя вакансии или None для анонимной вакансии. """
+    employer = vacancy.employer
+    return None if employer is None else employer.id
+
+
+def attach_employers(vacancies: list[ShortVacancyHHSchema], employers: dict[str, Future]) -> list[EnrichedVacancyHHSchema]:
+    enriched = []
+    for vacancy in vacancies:
+        # getattr, а не __dict__, чтобы ленивые модели (parse_mode="lazy") разобрали все поля
+        fields = {name: getattr(vacancy, name) for name in vacancy.__fields__}
+        employer_id = employer_key(vacancy)
+        employer = None if employer_id is None else employers[employer_id].result()
+        if employer is not None:
+            fields["employer"] = employer
+        enriched.append(EnrichedVacancyHHSchema.construct(_fields_set=vacancy.__fields_set__, **fields))
+    return enriched
+
+
+def page_params(params: VacancySearchParamsHHSchema, page: int, per_page: int) -> VacancySearchParamsHHSchema:
+    return params.copy(update={"page": page, "per_page": per_page})
+
+
+def start_page(params: VacancySearchParamsHHSchema, limit: int) -> tuple[int, int]:
+    """ Страница, с которой начинается выдача, и размер страницы. Если в params задана page без per_page,
+    размер страницы - DEFAULT_PER_PAGE, как в api.hh.ru, иначе страницы берутся по limit, но не больше MAX_PER_PAGE.
+    """
+    if params.per_page:
+        return params.page or 0, params.per_page
+    if params.page is not None:
+        return params.page, DEFAULT_PER_PAGE
+    return 0, min(limit, MAX_PER_PAGE)
+
+
+def pages_needed(first: ShortVacancyListHHSchema, per_page: int, limit: int, start=0) -> range:
+    """ Номера страниц, которые нужно запросить после start, чтобы набрать limit вакансий. """
+    total = min(start * per_page + limit, first.found, SEARCH_DEPTH_LIMIT)
+    return range(start + 1, min(math.ceil(total / per_page), first.pages))
+
+
+def merge_pages(pages: list[ShortVacancyListHHSchema], limit: int) -> list[ShortVacancyHHSchema]:
+    """ Склеивает страницы по порядку, убирая повторы по id (выдача может сдвигаться между запросами). """
+    seen = set()
+    items = []
+    for page in pages:
+        for item in page.items:
+            if item.id in seen:
+                continue
+            seen.add(item.id)
+            items.append(item)
+    return items[:limit]
+
+
+def area_list(area) -> list[str]:
+    if area is None:
+        return []
+    return list(area) if isinstance(area, list) else [area]
+
+
+def harvest_window(params: VacancySearchParamsHHSchema) -> VacancySearchParamsHHSchema:
+    """ Явно задаёт окно date_from/date_to вместо period, чтобы его можно было делить.
+    Если одна из границ задана с точностью до секунд, вторая тоже приводится к datetime.
+    """
+    date_to = params.date_to or date.today() + timedelta(days=1)
+    date_from = params.date_from or date.today() - timedelta(days=params.period or DEFAULT_SEARCH_PERIOD)
+    if isinstance(date_from, datetime) and type(date_to) is date:
+        date_to = datetime.combine(date_to, time.min, tzinfo=date_from.tzinfo)
+    elif isinstance(date_to, datetime) and type(date_from) is date:
+        date_from = datetime.combine(date_from, time.min, tzinfo=date_to.tzinfo)
+    return params.copy(update={"date_from": date_from, "date_to": date_to, "period": None})
+
+
+def split_by_date(params: VacancySearchParamsHHSchema) -> Optional[list[VacancySearchParamsHHSchema]]:
+    """ Делит окно публикации пополам. Соседние окна пересекаются на границе, повторы убираются по id. """
+    span = params.date_to - params.date_from
+    if span <= (MIN_HARVEST_DATETIME_WINDOW if isinstance(params.date_from, datetime) else MIN_HARVEST_WINDOW):
+        return None
+    middle = params.date_from + span // 2
+    return [
+        params.copy(update={"date_to": middle}),
+        params.copy(update={"date_from": middle})
+    ]
+
+
+_client_lock = threading.Lock()
+
+
+def get_client(conf: Config) -> HHClient:
+    """ Возвращает клиент, закреплённый за конфигом, чтобы все вызовы с одним конфигом делили пул соединений. """
+    with _client_lock:
+        if conf._client is None:
+            conf._client = HHClient(conf)
+        return conf._client
@@ -1,10 +1,34 @@
-from pydantic import BaseSettings, Field
+from typing import Literal, Optional
+
+from pydantic import BaseSettings, Field, PrivateAttr
 
 
 class Config(BaseSettings):
     base_url: str = "https://api.hh.ru"
     token: str = Field(env='HH_TOKEN')
     test_offline = False
+    pool_size: int = Field(10, description="Количество keep-alive соединений в пуле клиента, не меньше max_concurrency")
+    connect_timeout: float = Field(5.0, description="Таймаут установки соединения, секунды")
+    read_timeout: float = Field(30.0, description="Таймаут чтения ответа, секунды")
+    max_retries: int = Field(3, description="Количество повторов при ответах 429 и 5xx")
+    backoff_factor: float = Field(0.5, description="Множитель экспоненциальной задержки между повторами")
+    max_concurrency: int = Field(20, description="Максимальное количество одновременных запросов")
+    rate_limit: Optional[float] = Field(None, description="Ограничение запросов в секунду на токен. Если не задано - без ограничения")
+    rate_limit_burst: Optional[int] = Field(None, description="Запас токенов для коротких всплесков запросов")
+    rate_limit_path: Optional[str] = Field(None, description="Файл состояния ограничителя, общий для нескольких процессов")
+    parse_mode: Literal["validate", "construct", "lazy"] = Field("validate", description="Разбор ответов: validate, construct или lazy, см. parsing.parse_model")
+    dictionaries_path: Optional[str] = Field(None, description="Каталог для сохранения справочников hh.ru")
+    dictionaries_ttl: float = Field(7 * 24 * 3600, description="Срок жизни сохранённых справочников, секунды")
+    cache_enabled: bool = Field(False, description="Кэшировать ответы api.hh.ru")
+    cache_path: Optional[str] = Field(None, description="Файл SQLite для кэша. Если не задан - кэш только в памяти")
+    cache_memory_size: int = Field(1024, description="Количество ответов в LRU-кэше в памяти")
+    cache_ttl: Optional[dict[str, float]] = Field(None, description="TTL в секундах по эндпоинтам, например {'vacancies/{id}': 3600}")
+    metrics_enabled: bool = Field(False, description="Собирать метрики запросов и разбора ответов, см. metrics.get_metrics")
+
+    _client = PrivateAttr(default=None)
+    _cache = PrivateAttr(default=None)
+    _rate_limiter = PrivateAttr(default=None)
+    _metrics = PrivateAttr(default=None)
 
     class Config:
         env_file = '.env'
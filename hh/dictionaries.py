@@ -0,0 +1,194 @@
+import bisect
+import json
+import os
+import threading
+import time
+from typing import Awaitable, Callable, Iterable, NamedTuple, Optional
+
+from .schemas import VacancySearchParamsHHSchema
+
+DICTIONARIES_VERSION = 1
+DICTIONARY_ENDPOINTS = {
+    "dictionaries": "/dictionaries",
+    "areas": "/areas",
+    "metro": "/metro",
+    "professional_roles": "/professional_roles"
+}
+# параметр поиска -> справочник из /dictionaries, по которому он проверяется
+SEARCH_PARAM_DICTIONARIES = {
+    "search_field": "vacancy_search_fields",
+    "experience": "experience",
+    "employment": "employment",
+    "schedule": "schedule",
+    "currency": "currency",
+    "label": "vacancy_label",
+    "order_by": "vacancy_search_order"
+}
+
+
+class AreaNode(NamedTuple):
+    id: str
+    name: str
+    parent_id: Optional[str]
+    children: tuple
+
+
+class Dictionaries:
+    """ Справочники hh.ru (/dictionaries, /areas, /metro, /professional_roles), загруженные один раз.
+    Каждый справочник загружается отдельно, при первом обращении к нему: для работы с регионами
+    достаточно /areas. Если задан path, ответы сохраняются в этот каталог и перезапрашиваются только
+    по истечении ttl секунд или при смене DICTIONARIES_VERSION. Поверх них строятся индексы: узлы и
+    дерево регионов, поиск регионов по началу названия, id станций и линий метро, профролей и значений
+    справочников. Асинхронный клиент передаёт fetch_async и загружает справочники через load_async.
+    """
+
+    def __init__(self, fetch: Optional[Callable[[str], object]], path: Optional[str] = None, ttl: float = 7 * 24 * 3600,
+                 fetch_async: Optional[Callable[[str], Awaitable]] = None):
+        self.fetch = fetch
+        self.fetch_async = fetch_async
+        self.path = path
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._loaded = set()
+
+    def load(self, refresh=False, names: Iterable[str] = tuple(DICTIONARY_ENDPOINTS)) -> "Dictionaries":
+        with self._lock:
+            for name in names:
+                if refresh or name not in self._loaded:
+                    data = None if refresh else self._read_stored(name)
+                    if data is None:
+                        data = self._store(name, self.fetch(DICTIONARY_ENDPOINTS[name]))
+                    self._build(name, data)
+        return self
+
+    async def load_async(self, refresh=False, names: Iterable[str] = tuple(DICTIONARY_ENDPOINTS)) -> "Dictionaries":
+        for name in names:
+            if refresh or name not in self._loaded:
+                data = None if refresh else self._read_stored(name)
+                if data is None:
+                    data = self._store(name, await self.fetch_async(DICTIONARY_ENDPOINTS[name]))
+                with self._lock:
+                    self._build(name, data)
+        return self
+
+    def _file_path(self, name: str) -> Optional[str]:
+        return None if self.path is None else os.path.join(self.path, f"{name}.json")
+
+    def _read_stored(self, name: str):
+        file_path = self._file_path(name)
+        if file_path is None or not os.path.exists(file_path):
+            return None
+        with open(file_path, encoding="utf-8") as file:
+            stored = json.load(file)
+        if stored.get("version") == DICTIONARIES_VERSION and time.time() - stored["fetched_at"] < self.ttl:
+            return stored["data"]
+        return None
+
+    def _store(self, name: str, data):
+        file_path = self._file_path(name)
+        if file_path is not None:
+            os.makedirs(self.path, exist_ok=True)
+            with open(file_path, "w", encoding="utf-8") as file:
+                json.dump({"version": DICTIONARIES_VERSION, "fetched_at": time.time(), "data": data}, file, ensure_ascii=False)
+        return data
+
+    def _build(self, name: str, data):
+        getattr(self, f"_build_{name}")(data)
+        self._loaded.add(name)
+
+    def _build_dictionaries(self, data: dict):
+        self.values = {
+            name: {str(item.get("id", item.get("code"))): item.get("name") for item in items}
+            for name, items in data.items() if isinstance(items, list)
+        }
+
+    def _build_areas(self, data: list):
+        self.areas: dict[str, AreaNode] = {}
+        self.root_areas = tuple(area["id"] for area in data)
+        stack = list(data)
+        while stack:
+            area = stack.pop()
+            self.areas[area["id"]] = AreaNode(area["id"], area["name"], area.get("parent_id"), tuple(child["id"] for child in area["areas"]))
+            stack.extend(area["areas"])
+        self._area_names = sorted((node.name.lower(), node.id) for node in self.areas.values())
+
+    def _build_metro(self, data: list):
+        self.metro_lines = {}
+        self.metro_stations = {}
+        for city in data:
+            for line in city["lines"]:
+                self.metro_lines[line["id"]] = line["name"]
+                for station in line["stations"]:
+                    self.metro_stations[station["id"]] = station["name"]
+
+    def _build_professional_roles(self, data: dict):
+        self.professional_roles = {
+            role["id"]: role["name"]
+            for category in data["categories"] for role in category["roles"]
+        }
+
+    def _load_areas(self) -> dict[str, AreaNode]:
+        return self.load(names=("areas",)).areas
+
+    def area(self, area_id: str) -> AreaNode:
+        node = self._load_areas().get(area_id)
+        if node is None:
+            raise ValueError(f"Регион {area_id} отсутствует в справочнике /areas")
+        return node
+
+    def area_children(self, area_id: Optional[str]) -> list[str]:
+        """ Дочерние регионы, для None - регионы верхнего уровня (страны). """
+        self._load_areas()
+        if area_id is None:
+            return list(self.root_areas)
+        return list(self.area(area_id).children)
+
+    def area_parents(self, area_id: str) -> list[AreaNode]:
+        """ Цепочка родительских регионов от ближайшего к стране. """
+        parents = []
+        node = self.area(area_id)
+        while node.parent_id is not None:
+            node = self.area(node.parent_id)
+            parents.append(node)
+        return parents
+
+    def expand_area(self, area_id: str) -> list[str]:
+        """ Регион и все вложенные в него регионы. """
+        ids = []
+        stack = [area_id]
+        while stack:
+            node = self.area(stack.pop())
+            ids.append(node.id)
+            stack.extend(reversed(node.children))
+        return ids
+
+    def find_areas(self, prefix: str, limit=20) -> list[AreaNode]:
+        """ Регионы, название которых начинается с prefix, без учёта регистра. """
+        self._load_areas()
+        prefix = prefix.lower()
+        start = bisect.bisect_left(self._area_names, (prefix, ""))
+        found = []
+        for name, area_id in self._area_names[start:]:
+            if not name.startswith(prefix) or len(found) >= limit:
+                break
+            found.append(self.areas[area_id])
+        return found
+
+    def resolve(self, dictionary: str, value_id: str) -> Optional[str]:
+        """ Название значения справочника из /dictionaries, например resolve("experience", "noExperience"). """
+        return self.load(names=("dictionaries",)).values.get(dictionary, {}).get(value_id)
+
+    def validate_params(self, params: VacancySearchParamsHHSchema):
+        """ Проверяет id в параметрах поиска по справочникам без запросов к API. """
+        self.load()
+        unknown = []
+        checks = [("area", self.areas), ("metro", self.metro_lines.keys() | self.metro_stations.keys()),
+                  ("professional_role", self.professional_roles)]
+        checks += [(param, self.values.get(dictionary, {})) for param, dictionary in SEARCH_PARAM_DICTIONARIES.items()]
+        for param, known in checks:
+            values = getattr(params, param)
+            for value in [] if values is None else values if isinstance(values, list) else [values]:
+                if str(value) not in known:
+                    unknown.append(f"{param}={value}")
+        if unknown:
+            raise ValueError(f"Значения отсутствуют в справочниках hh.ru: {', '.join(unknown)}")
@@ -0,0 +1,88 @@
+import itertools
+from typing import Callable, Iterable, Iterator, NamedTuple, Optional
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from .schemas import IdNameHHSchema, ShortVacancyHHSchema
+
+
+class Column(NamedTuple):
+    name: str
+    type: pa.DataType
+    get: Callable[[ShortVacancyHHSchema], object]
+
+
+def _id(value: Optional[IdNameHHSchema]) -> Optional[str]:
+    return None if value is None else value.id
+
+
+def _name(value: Optional[IdNameHHSchema]) -> Optional[str]:
+    return None if value is None else value.name
+
+
+VACANCY_COLUMNS = [
+    Column("id", pa.string(), lambda v: v.id),
+    Column("name", pa.string(), lambda v: v.name),
+    Column("published_at", pa.timestamp("us", tz="UTC"), lambda v: v.published_at),
+    Column("salary_from", pa.int64(), lambda v: None if v.salary is None else v.salary.from_),
+    Column("salary_to", pa.int64(), lambda v: None if v.salary is None else v.salary.to_),
+    Column("salary_currency", pa.dictionary(pa.int32(), pa.string()), lambda v: None if v.salary is None else v.salary.currency),
+    Column("salary_gross", pa.bool_(), lambda v: None if v.salary is None else v.salary.gross),
+    Column("area_id", pa.string(), lambda v: _id(v.area)),
+    Column("area_name", pa.string(), lambda v: _name(v.area)),
+    Column("employer_id", pa.string(), lambda v: None if v.employer is None else v.employer.id),
+    Column("employer_name", pa.string(), lambda v: None if v.employer is None else v.employer.name),
+    Column("type_id", pa.string(), lambda v: _id(v.type)),
+    Column("type_name", pa.string(), lambda v: _name(v.type)),
+    Column("department_id", pa.string(), lambda v: _id(v.department)),
+    Column("department_name", pa.string(), lambda v: _name(v.department)),
+    Column("premium", pa.bool_(), lambda v: v.premium),
+    Column("archived", pa.bool_(), lambda v: v.archived),
+    Column("has_test", pa.bool_(), lambda v: v.has_test)
+]
+
+VACANCY_SCHEMA = pa.schema([(column.name, column.type) for column in VACANCY_COLUMNS])
+
+
+def to_record_batch(vacancies: list[ShortVacancyHHSchema]) -> pa.RecordBatch:
+    """ Переводит список вакансий в колоночный RecordBatch со схемой VACANCY_SCHEMA. """
+    arrays = []
+    for column in VACANCY_COLUMNS:
+        values = [column.get(vacancy) for vacancy in vacancies]
+        if pa.types.is_dictionary(column.type):
+            arrays.append(pa.array(values, type=column.type.value_type).dictionary_encode())
+        else:
+            arrays.append(pa.array(values, type=column.type))
+    return pa.RecordBatch.from_arrays(arrays, schema=VACANCY_SCHEMA)
+
+
+def to_numpy(vacancies: list[ShortVacancyHHSchema]) -> dict[str, np.ndarray]:
+    """ Колонки в виде массивов NumPy. Целые колонки с пропусками становятся float64 с NaN. """
+    batch = to_record_batch(vacancies)
+    return {
+        name: column.dictionary_decode().to_numpy(zero_copy_only=False) if pa.types.is_dictionary(column.type)
+        else column.to_numpy(zero_copy_only=False)
+        for name, column in zip(batch.schema.names, batch.columns)
+    }
+
+
+def iter_record_batches(vacancies: Iterable[ShortVacancyHHSchema], batch_size=10000) -> Iterator[pa.RecordBatch]:
+    """ Режет поток вакансий (например, harvest_vacancies) на батчи, не держа в памяти весь поток. """
+    vacancies = iter(vacancies)
+    while True:
+        chunk = list(itertools.islice(vacancies, batch_size))
+        if not chunk:
+            return
+        yield to_record_batch(chunk)
+
+
+def write_parquet(vacancies: Iterable[ShortVacancyHHSchema], path: str, batch_size=10000) -> int:
+    """ Пишет поток вакансий в Parquet по батчам, возвращает количество записанных строк. """
+    rows = 0
+    with pq.ParquetWriter(path, VACANCY_SCHEMA) as writer:
+        for batch in iter_record_batches(vacancies, batch_size=batch_size):
+            writer.write_batch(batch)
+            rows += batch.num_rows
+    return rows
@@ -0,0 +1,217 @@
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Iterable, Optional
+from urllib.parse import parse_qs, urlparse
+
+FIXTURES_PATH = os.path.join(os.path.dirname(__file__), "fixtures")
+FIRST_VACANCY_ID = 50000000
+SEARCH_DEPTH_LIMIT = 2000
+
+
+def load_fixture(name: str):
+    with open(os.path.join(FIXTURES_PATH, f"{name}.json"), encoding="utf-8") as file:
+        return json.load(file)
+
+
+def parse_moment(value: str) -> datetime:
+    if len(value) == 10:
+        return datetime.fromisoformat(value).replace(tzinfo=timezone.utc)
+    return datetime.strptime(value, "%Y-%m-%dT%H:%M:%S%z")
+
+
+class FakeHHServer:
+    """ Локальная замена api.hh.ru для тестов и бенчмарков: /me, /vacancies, /vacancies/{id},
+    /employers и /employers/{id} из записанных ответов в fixtures/. Выдача поиска состоит из found
+    вакансий, опубликованных с шагом spacing назад от now и распределённых по employers работодателям.
+    latency добавляет задержку к каждому ответу, error_rate и throttle_rate - долю ответов 503 и 429.
+    """
+
+    def __init__(self, found=2000, employers=50, latency=0.0, error_rate=0.0, throttle_rate=0.0,
+                 missing_ids: Iterable[str] = (), spacing=timedelta(minutes=1), now: Optional[datetime] = None,
+                 seed: Optional[int] = None, host="127.0.0.1", port=0):
+        self.found = found
+        self.employers = employers
+        self.latency = latency
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.missing_ids = set(missing_ids)
+        self.spacing = spacing
+        self.now = now or datetime(2022, 3, 12, 12, 0, tzinfo=timezone.utc)
+        self.requests = 0
+        self.paths: list[str] = []
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._fixtures = {name: load_fixture(name) for name in ("me", "short_vacancy", "vacancy", "short_employer", "employer")}
+        self._httpd = _Server((host, port), _Handler)
+        self._httpd.fake = self
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "FakeHHServer":
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def vacancy_id(self, index: int) -> str:
+        return str(FIRST_VACANCY_ID + index)
+
+    def employer_id(self, index: int) -> str:
+        return str(1000 + index % self.employers)
+
+    def published_at(self, index: int) -> datetime:
+        return self.now - self.spacing * index
+
+    def short_vacancy(self, index: int) -> dict:
+        vacancy_id = self.vacancy_id(index)
+        employer_id = self.employer_id(index)
+        return self._vacancy_fields(self._fixtures["short_vacancy"], vacancy_id, employer_id, self.published_at(index))
+
+    def vacancy(self, vacancy_id: str) -> dict:
+        index = int(vacancy_id) - FIRST_VACANCY_ID
+        published_at = self.published_at(index)
+        vacancy = self._vacancy_fields(self._fixtures["vacancy"], vacancy_id, self.employer_id(index), published_at)
+        vacancy["created_at"] = vacancy["published_at"]
+        return vacancy
+
+    def _vacancy_fields(self, template: dict, vacancy_id: str, employer_id: str, published_at: datetime) -> dict:
+        return dict(
+            template,
+            id=vacancy_id,
+            url=f"https://api.hh.ru/vacancies/{vacancy_id}?host=hh.ru",
+            alternate_url=f"https://hh.ru/vacancy/{vacancy_id}",
+            published_at=published_at.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            employer=self._employer_fields(self._fixtures["short_employer"], employer_id)
+        )
+
+    def _employer_fields(self, template: dict, employer_id: str) -> dict:
+        return dict(
+            template,
+            id=employer_id,
+            url=f"https://api.hh.ru/employers/{employer_id}",
+            alternate_url=f"https://hh.ru/employer/{employer_id}",
+            vacancies_url=f"https://api.hh.ru/vacancies?employer_id={employer_id}"
+        )
+
+    def search(self, query: dict) -> tuple[int, object]:
+        per_page = int(query.get("per_page", ["20"])[0])
+        page = int(query.get("page", ["0"])[0])
+        if per_page * (page + 1) > SEARCH_DEPTH_LIMIT:
+            return 400, {"errors": [{"type": "bad_argument", "value": "page"}]}
+        indexes = range(self.found)
+        if "date_from" in query or "date_to" in query:
+            date_from = parse_moment(query["date_from"][0]) if "date_from" in query else None
+            date_to = parse_moment(query["date_to"][0]) if "date_to" in query else None
+            indexes = [
+                index for index in indexes
+                if (date_from is None or self.published_at(index) >= date_from) and (date_to is None or self.published_at(index) <= date_to)
+            ]
+        if "employer_id" in query:
+            indexes = [index for index in indexes if self.employer_id(index) in query["employer_id"]]
+        found = len(indexes)
+        return 200, {
+            "items": [self.short_vacancy(index) for index in indexes[page * per_page:(page + 1) * per_page]],
+            "found": found,
+            "pages": min(-(-found // per_page), SEARCH_DEPTH_LIMIT // per_page) if per_page else 0,
+            "per_page": per_page,
+            "page": page,
+            "clusters": None,
+            "arguments": None,
+            "alternate_url": "https://hh.ru/search/vacancy"
+        }
+
+    def employers_page(self, query: dict) -> tuple[int, object]:
+        per_page = int(query.get("per_page", ["20"])[0])
+        page = int(query.get("page", ["0"])[0])
+        ids = [str(1000 + index) for index in range(self.employers)]
+        return 200, {
+            "items": [self._employer_fields(self._fixtures["short_employer"], employer_id) for employer_id in ids[page * per_page:(page + 1) * per_page]],
+            "found": len(ids),
+            "pages": -(-len(ids) // per_page) if per_page else 0,
+            "per_page": per_page,
+            "page": page
+        }
+
+    def respond(self, path: str, query: dict) -> tuple[int, object]:
+        with self._lock:
+            self.requests += 1
+            self.paths.append(path)
+            roll = self._random.random()
+        if roll < self.throttle_rate:
+            return 429, {"errors": [{"type": "too_many_requests"}]}
+        if roll < self.throttle_rate + self.error_rate:
+            return 503, {"errors": [{"type": "service_unavailable"}]}
+        segments = path.strip("/").split("/")
+        if segments == ["me"]:
+            return 200, self._fixtures["me"]
+        if segments == ["vacancies"]:
+            return self.search(query)
+        if segments == ["employers"]:
+            return self.employers_page(query)
+        if len(segments) == 2 and segments[1].isdigit():
+            if segments[1] in self.missing_ids:
+                return 404, {"errors": [{"type": "not_found"}]}
+            if segments[0] == "vacancies":
+                return 200, self.vacancy(segments[1])
+            if segments[0] == "employers":
+                return 200, self._employer_fields(self._fixtures["employer"], segments[1])
+        return 404, {"errors": [{"type": "not_found"}]}
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    fake: FakeHHServer
+
+    def handle_error(self, request, client_address):
+        # клиенты закрывают keep-alive соединения без предупреждения, это не ошибка
+        pass
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        fake = self.server.fake
+        if fake.latency:
+            time.sleep(fake.latency)
+        url = urlparse(self.path)
+        status, body = fake.respond(url.path, parse_qs(url.query))
+        data = json.dumps(body, ensure_ascii=False).encode()
+        etag = f'"{hashlib.sha1(data).hexdigest()}"' if status == 200 else None
+        if etag is not None and self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=UTF-8")
+        self.send_header("Content-Length", str(len(data)))
+        if etag is not None:
+            self.send_header("ETag", etag)
+        if status == 429:
+            self.send_header("Retry-After", "0")
+        self.end_headers()
+        self.wfile.write(data)
@@ -1,42 +1,54 @@
+from typing import Iterable, Iterator, Optional
+
 from .config import Config
-import requests
+from .client import get_client, VacancyResult, VacancyIterator
 
 from .schemas import (
     MeHHSchema,
     VacancySearchParamsHHSchema,
     ShortVacancyListHHSchema,
     VacancyHHSchema,
-    ShortVacancyHHSchema
+    ShortVacancyHHSchema,
+    EmployerSearchParamsHHSchema,
+    ShortEmployerListHHSchema,
+    EmployerHHSchema,
+    EnrichedVacancyHHSchema
 )
 
 
 def get_hh_me(conf=Config()) -> MeHHSchema:
-    response = requests.get(f"{conf.base_url}/me", headers=conf.hh_headers)
-    if response.status_code != 200:
-        raise ValueError(response.reason)
-    json_dict = response.json()
-    return MeHHSchema.parse_obj(json_dict)
+    return get_client(conf).get_me()
 
 
 def get_hh_vacancies_obj(params: VacancySearchParamsHHSchema, conf=Config()) -> ShortVacancyListHHSchema:
-    params_str = params.get_params()
-    response = requests.get(f"{conf.base_url}/vacancies{params_str}", headers=conf.hh_headers)
-    if response.status_code != 200:
-        raise ValueError(response.reason)
-    json_dict = response.json()
-    obj = ShortVacancyListHHSchema.parse_obj(json_dict)
-    return obj
+    return get_client(conf).get_vacancies_obj(params=params)
 
 
 def get_hh_short_vacancies(params: VacancySearchParamsHHSchema, limit=20, conf=Config()) -> list[ShortVacancyHHSchema]:
-    items = get_hh_vacancies_obj(params=params, conf=conf).items
-    # TODO: в зависимости от лимита доп запросы делать
-    return items
+    return get_client(conf).get_short_vacancies(params=params, limit=limit)
+
+
+def iter_hh_vacancies(params: VacancySearchParamsHHSchema, page=0, index=0, conf=Config()) -> VacancyIterator:
+    return get_client(conf).iter_vacancies(params=params, page=page, index=index)
 
 
 def get_hh_vacancy(vacancy_id: str, conf=Config()) -> VacancyHHSchema:
-    response = requests.get(f"{conf.base_url}/vacancies/{vacancy_id}", headers=conf.hh_headers)
-    if response.status_code != 200:
-        raise ValueError(response.reason)
-    json_dict = response.json()
-    return VacancyHHSchema.parse_obj(json_dict)
+    return get_client(conf).get_vacancy(vacancy_id=vacancy_id)
+
+
+def get_hh_vacancies(vacancy_ids: Iterable[str], workers: Optional[int] = None, ordered=False,
+                     conf=Config()) -> Iterator[VacancyResult]:
+    return get_client(conf).get_vacancies(vacancy_ids=vacancy_ids, workers=workers, ordered=ordered)
+
+
+def get_hh_employers_obj(params: EmployerSearchParamsHHSchema, conf=Config()) -> ShortEmployerListHHSchema:
+    return get_client(conf).get_employers_obj(params=params)
+
+
+def get_hh_employer(employer_id: str, conf=Config()) -> EmployerHHSchema:
+    return get_client(conf).get_employer(employer_id=employer_id)
+
+
+def enrich_hh_employers(vacancies: Iterable[ShortVacancyHHSchema], workers: Optional[int] = None,
+                        conf=Config()) -> Iterator[EnrichedVacancyHHSchema]:
+    return get_client(conf).enrich_employers(vacancies=vacancies, workers=workers)
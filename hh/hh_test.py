@@ -1,11 +1,28 @@
+import asyncio
 from datetime import date
 import datetime
+import itertools
+import pickle
 import pytest
 import requests
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pydantic import HttpUrl
 
 import hh
+from . import bench
+from .aio import AsyncHH, aiter_items
+from .cache import ResponseCache, endpoint_name
 from .config import Config
+from .client import HHClient, HHError, VacancyResult
+from .dictionaries import Dictionaries
+from .fake_server import FakeHHServer
+from .metrics import get_metrics
+from .parsing import PARSE_MODES, parse_model
+from .ratelimit import RateLimiter
+from .singleflight import AsyncSingleFlight, SingleFlight
+from .sync import SYNC_OVERLAP, VacancySync, Watermark, query_key
 # from models import CacheModel
 from .schemas import (
     VacancyHHSchema,
@@ -15,7 +32,9 @@ from .schemas import (
     AreaHHSchema,
     ShortEmployerListHHSchema,
     EmployerHHSchema,
-    ShortVacancyListHHSchema, KeySkillHHSchema, VacancyEmployerHHSchema, IdNameHHSchema, SpecializationHHSchema,
+    EmployerSearchParamsHHSchema,
+    EnrichedVacancyHHSchema,
+    ShortVacancyListHHSchema, ShortVacancyHHSchema, KeySkillHHSchema, VacancyEmployerHHSchema, IdNameHHSchema, SpecializationHHSchema,
     MetroStationsHHSchema, PhoneHHSchema, ContactsHHSchema
 )
 
@@ -54,9 +73,52 @@ def hh_search_params_schema():
     )
 
 
+@pytest.fixture
+def hh_short_vacancy_list_dict():
+    item = {
+        "id": "52882698", "premium": False, "has_test": False, "response_url": None,
+        "address": {
+            "city": "Москва", "street": "улица Лестева", "building": "18", "description": None, "lat": 55.715, "lng": 37.608,
+            "metro_stations": [{"station_id": "6.8", "station_name": "Шаболовская", "line_id": "6", "line_name": "Калужско-Рижская", "lat": 55.718, "lng": 37.607}]
+        },
+        "alternate_url": "https://hh.ru/vacancy/52882698",
+        "apply_alternate_url": "https://hh.ru/applicant/vacancy_response?vacancyId=52882698",
+        "department": None, "salary": {"from": 40000, "to": 100000, "gross": True, "currency": "RUR"},
+        "name": "Python разработчик", "insider_interview": None,
+        "area": {"id": "1", "name": "Москва", "url": "https://api.hh.ru/areas/1"},
+        "url": "https://api.hh.ru/vacancies/52882698?host=hh.ru", "published_at": "2022-03-12T10:26:40+0300", "relations": [],
+        "employer": {
+            "id": "1740", "name": "Яндекс", "url": "https://api.hh.ru/employers/1740", "alternate_url": "https://hh.ru/employer/1740",
+            "vacancies_url": "https://api.hh.ru/vacancies?employer_id=1740",
+            "logo_urls": {"original": "https://hhcdn.ru/employer-logo-original/1.png", "240": "https://hhcdn.ru/employer-logo/2.png", "90": "https://hhcdn.ru/employer-logo/3.png"}
+        },
+        "response_letter_required": False, "type": {"id": "open", "name": "Открытая"}, "archived": False,
+        "working_days": [], "working_time_intervals": [], "working_time_modes": [], "accept_temporary": False
+    }
+    return {
+        "items": [dict(item, id=str(52882698 + i)) for i in range(100)],
+        "found": 100, "pages": 1, "per_page": 100, "page": 0, "alternate_url": "https://hh.ru/search/vacancy?text=python"
+    }
+
+
 @pytest.mark.dependency()
 def test_search_params_schema(hh_search_params_schema):
-    assert hh_search_params_schema.get_params() == "?text=python&search_field=description&search_field=name&currency=RUR&salary=100000&only_with_salary=True&date_from=2022-01-02&no_magic=True"
+    assert hh_search_params_schema.get_params() == "?currency=RUR&date_from=2022-01-02&no_magic=true&only_with_salary=true&salary=100000&search_field=description&search_field=name&text=python"
+
+
+def test_search_params_fingerprint(hh_search_params_schema):
+    same = VacancySearchParamsHHSchema(
+        salary=100000,
+        currency="RUR",
+        only_with_salary=True,
+        no_magic=True,
+        date_from="2022-01-02",
+        search_field=["name", "description"],
+        text="python"
+    )
+    assert same.fingerprint() == hh_search_params_schema.fingerprint()
+    assert VacancySearchParamsHHSchema(text="c++ & go").get_params() == "?text=c%2B%2B%20%26%20go"
+    assert VacancySearchParamsHHSchema(text="python", area="2").fingerprint() != same.fingerprint()
 
 
 @pytest.mark.skipif(condition=conf.test_offline, reason="offline mode")
@@ -65,6 +127,12 @@ def test_hh_me(hh_config):
     assert me.is_application == True
 
 
+def test_client_is_shared_per_config(hh_config):
+    client = hh.get_client(hh_config)
+    assert hh.get_client(hh_config) is client
+    assert client.timeout == (hh_config.connect_timeout, hh_config.read_timeout)
+
+
 @pytest.mark.skipif(condition=conf.test_offline, reason="offline mode")
 def test_get_vacancy(hh_config):
     vacancy_id = "52276391"
@@ -72,6 +140,436 @@ def test_get_vacancy(hh_config):
     assert vacancy.id == vacancy_id
 
 
+@pytest.mark.skipif(condition=conf.test_offline, reason="offline mode")
+def test_get_vacancies_bulk(hh_config):
+    vacancy_ids = ["52276391", "0"]
+    results = list(hh.get_hh_vacancies(vacancy_ids, workers=2, ordered=True, conf=hh_config))
+    assert [result.id for result in results] == vacancy_ids
+    assert results[0].vacancy.id == vacancy_ids[0]
+    assert results[1].vacancy is None and results[1].error.status_code == 404
+
+
+@pytest.mark.skipif(condition=conf.test_offline, reason="offline mode")
+def test_get_short_vacancies_limit(hh_config):
+    params = VacancySearchParamsHHSchema(text="python")
+    vacancies = hh.get_hh_short_vacancies(params=params, limit=150, conf=hh_config)
+    assert len(vacancies) == 150
+    assert len({vacancy.id for vacancy in vacancies}) == 150
+
+
+@pytest.mark.skipif(condition=conf.test_offline, reason="offline mode")
+def test_iter_vacancies_resume(hh_config):
+    params = VacancySearchParamsHHSchema(text="python", period=3)
+    client = hh.get_client(hh_config)
+    with client.iter_vacancies(params, per_page=10) as vacancies:
+        head = [vacancy.id for vacancy in itertools.islice(vacancies, 15)]
+        assert (vacancies.page, vacancies.index) == (1, 5)
+    with client.iter_vacancies(params, page=0, per_page=10) as vacancies:
+        assert [vacancy.id for vacancy in itertools.islice(vacancies, 15)] == head
+
+
+@pytest.mark.skipif(condition=conf.test_offline, reason="offline mode")
+def test_harvest_vacancies(hh_config):
+    params = VacancySearchParamsHHSchema(text="python", period=3)
+    vacancies = list(itertools.islice(hh.get_client(hh_config).harvest_vacancies(params), 300))
+    assert len({vacancy.id for vacancy in vacancies}) == len(vacancies)
+
+
+@pytest.mark.skipif(condition=conf.test_offline, reason="offline mode")
+def test_async_get_vacancy(hh_config):
+    vacancy_id = "52276391"
+
+    async def fetch():
+        async with AsyncHH(hh_config, concurrency=2) as api:
+            return await asyncio.gather(api.get_me(), api.get_vacancy(vacancy_id=vacancy_id))
+
+    me, vacancy = asyncio.run(fetch())
+    assert me.is_application == True
+    assert vacancy.id == vacancy_id
+
+
+def test_parse_modes(hh_short_vacancy_list_dict):
+    expected = ShortVacancyListHHSchema.parse_obj(hh_short_vacancy_list_dict).dict()
+    for mode in PARSE_MODES:
+        vacancies = parse_model(ShortVacancyListHHSchema, hh_short_vacancy_list_dict, mode)
+        for vacancy in vacancies.items:
+            assert vacancy.name and vacancy.salary.currency == "RUR"
+        assert isinstance(vacancies.items[0], ShortVacancyHHSchema)
+        assert vacancies.items[0].published_at == datetime.datetime(2022, 3, 12, 7, 26, 40, tzinfo=datetime.timezone.utc)
+        assert vacancies.items[0].address.metro_stations[0].line_id == "6"
+        assert vacancies.dict() == expected
+
+
+def test_lazy_model_pickle(hh_short_vacancy_list_dict):
+    vacancies = parse_model(ShortVacancyListHHSchema, hh_short_vacancy_list_dict, "lazy")
+    restored = pickle.loads(pickle.dumps(vacancies))
+    assert type(restored) is ShortVacancyListHHSchema and type(restored.items[0]) is ShortVacancyHHSchema
+    assert restored == ShortVacancyListHHSchema.parse_obj(hh_short_vacancy_list_dict)
+    with pytest.raises(ValueError):
+        Config(parse_mode="lazzy")
+
+
+def test_export_parquet(hh_short_vacancy_list_dict, tmp_path):
+    pytest.importorskip("pyarrow")
+    from .export import to_numpy, write_parquet
+    import pyarrow.parquet as pq
+    vacancies = ShortVacancyListHHSchema.parse_obj(hh_short_vacancy_list_dict).items
+    vacancies[1].salary = None
+    columns = to_numpy(vacancies)
+    assert columns["salary_from"][0] == 40000 and columns["salary_from"][1] != columns["salary_from"][1]
+    assert columns["employer_id"][0] == "1740" and columns["salary_currency"][0] == "RUR"
+    path = str(tmp_path / "vacancies.parquet")
+    assert write_parquet(iter(vacancies), path, batch_size=30) == len(vacancies)
+    assert pq.ParquetFile(path).metadata.num_row_groups == 4
+    assert pq.read_table(path, columns=["area_id"]).column("area_id").to_pylist() == ["1"] * len(vacancies)
+
+
+def test_sync_watermark(hh_config, tmp_path):
+    params = VacancySearchParamsHHSchema(text="python", area=["1", "2"])
+    window = params.copy(update={"date_from": date(2022, 1, 2), "page": 3})
+    assert query_key(params) == query_key(window)
+    sync = VacancySync(hh.get_client(hh_config), str(tmp_path / "sync.db"))
+    assert sync.get_watermark(params) is None
+    published_at = datetime.datetime(2022, 3, 12, 10, 26, 40, tzinfo=datetime.timezone(datetime.timedelta(hours=3)))
+    sync.set_watermark(window, Watermark(published_at, frozenset({"1", "2"})))
+    assert sync.get_watermark(params) == Watermark(published_at, frozenset({"1", "2"}))
+    sync.reset(params)
+    assert sync.get_watermark(params) is None
+
+
+class SyncStubClient:
+    """ harvest_vacancies по заданному списку вакансий с фильтром по date_from, как в api.hh.ru. """
+
+    def __init__(self, vacancies):
+        self.vacancies = list(vacancies)
+        self.queries = []
+
+    def harvest_vacancies(self, params):
+        self.queries.append(params)
+        return (vacancy for vacancy in self.vacancies if params.date_from is None or vacancy.published_at >= params.date_from)
+
+    def get_vacancies(self, vacancy_ids, workers=None):
+        return (VacancyResult(id=vacancy_id) for vacancy_id in vacancy_ids)
+
+
+def test_sync_new_vacancies(fake_hh, tmp_path):
+    ids = lambda vacancies: [vacancy.id for vacancy in vacancies]
+    vacancy = lambda vacancy_id, published_at: ShortVacancyHHSchema.parse_obj(
+        dict(fake_hh.short_vacancy(0), id=vacancy_id, published_at=published_at.isoformat())
+    )
+    latest_at = fake_hh.published_at(0)
+    vacancies = [vacancy("1", latest_at), vacancy("2", latest_at)]
+    vacancies += [vacancy(str(index), fake_hh.published_at(index)) for index in range(3, 11)]
+    client = SyncStubClient(vacancies)
+    sync = VacancySync(client, str(tmp_path / "sync.db"))
+    params = VacancySearchParamsHHSchema(text="python")
+
+    assert ids(sync.new_vacancies(params)) == [str(index) for index in range(1, 11)]
+    assert client.queries[0].date_from is None
+    assert sync.get_watermark(params) == Watermark(latest_at, frozenset({"1", "2"}))
+    # вакансии из окна перекрытия возвращаются поиском, но уже были отданы
+    assert ids(sync.new_vacancies(params)) == []
+    assert client.queries[1].date_from == latest_at - SYNC_OVERLAP
+
+    client.vacancies += [vacancy("11", latest_at), vacancy("12", latest_at + datetime.timedelta(minutes=1))]
+    abandoned = sync.new_vacancies(params)
+    assert next(abandoned).id == "11"
+    abandoned.close()
+    assert sync.get_watermark(params) == Watermark(latest_at, frozenset({"1", "2"}))
+    assert ids(sync.new_vacancies(params)) == ["11", "12"]
+    assert sync.get_watermark(params) == Watermark(latest_at + datetime.timedelta(minutes=1), frozenset({"12"}))
+
+    client.vacancies.append(vacancy("13", latest_at + datetime.timedelta(minutes=2)))
+    assert ids(sync.new_vacancy_details(params)) == ["13"]
+    assert ids(sync.new_vacancy_details(params)) == []
+    sync.close()
+
+
+@pytest.fixture
+def hh_dictionaries_responses():
+    return {
+        "/dictionaries": {
+            "experience": [{"id": "noExperience", "name": "Нет опыта"}, {"id": "between1And3", "name": "От 1 года до 3 лет"}],
+            "currency": [{"code": "RUR", "abbr": "руб.", "name": "Рубли", "default": True}]
+        },
+        "/areas": [{"id": "113", "parent_id": None, "name": "Россия", "areas": [
+            {"id": "1", "parent_id": "113", "name": "Москва", "areas": []},
+            {"id": "1620", "parent_id": "113", "name": "Республика Марий Эл", "areas": [
+                {"id": "1624", "parent_id": "1620", "name": "Йошкар-Ола", "areas": []}
+            ]},
+            {"id": "2019", "parent_id": "113", "name": "Московская область", "areas": []}
+        ]}],
+        "/metro": [{"id": "1", "name": "Москва", "lines": [{"id": "6", "name": "Калужско-Рижская", "stations": [
+            {"id": "6.8", "name": "Алексеевская"}
+        ]}]}],
+        "/professional_roles": {"categories": [{"id": "11", "name": "Информационные технологии", "roles": [
+            {"id": "96", "name": "Программист, разработчик"}
+        ]}]}
+    }
+
+
+def test_dictionaries(hh_dictionaries_responses, tmp_path):
+    fetched = []
+
+    def fetch(path):
+        fetched.append(path)
+        return hh_dictionaries_responses[path]
+
+    assert Dictionaries(fetch).area_children("113") == ["1", "1620", "2019"]
+    assert fetched == ["/areas"]
+    with pytest.raises(ValueError, match="Регион 404"):
+        Dictionaries(fetch).area_children("404")
+    fetched.clear()
+    Dictionaries(fetch, path=str(tmp_path)).load()
+    dictionaries = Dictionaries(fetch, path=str(tmp_path))
+    assert dictionaries.area_children(None) == ["113"]
+    assert len(fetched) == 4
+    assert dictionaries.expand_area("1620") == ["1620", "1624"]
+    assert [area.id for area in dictionaries.area_parents("1624")] == ["1620", "113"]
+    assert [area.id for area in dictionaries.find_areas("моск")] == ["1", "2019"]
+    assert dictionaries.resolve("experience", "noExperience") == "Нет опыта"
+    dictionaries.validate_params(VacancySearchParamsHHSchema(area=["1", "1624"], metro="6.8", professional_role="96", currency="RUR"))
+    with pytest.raises(ValueError, match="experience=senior"):
+        dictionaries.validate_params(VacancySearchParamsHHSchema(area="1", experience="senior"))
+
+
+    async def fetch_async(path):
+        fetched.append(path)
+        return hh_dictionaries_responses[path]
+
+    fetched.clear()
+    dictionaries = Dictionaries(None, fetch_async=fetch_async)
+    assert asyncio.run(dictionaries.load_async(names=("areas",))).expand_area("1620") == ["1620", "1624"]
+    assert fetched == ["/areas"]
+
+
+def test_rate_limiter(tmp_path):
+    path = str(tmp_path / "limiter.json")
+    limiter = RateLimiter(rate=1000, burst=10, max_concurrency=8, cooldown=0, path=path)
+    shared = RateLimiter(rate=1000, burst=10, max_concurrency=8, cooldown=0, path=path)
+    limiter.acquire()
+    limiter.release(429)
+    assert limiter.limit == 4 and shared.limit == 4
+    for _ in range(4):
+        assert shared.try_acquire() == 0
+    assert shared.try_acquire() > 0
+    shared.release(200)
+    assert limiter.limit == 4.25
+    limiter.observe(503)
+    assert shared.limit == 2.125 and limiter.throttled == 2
+    asyncio.run(limiter.acquire_async())
+    assert limiter.in_flight == 1
+
+
+def test_single_flight():
+    flight = SingleFlight()
+    calls = []
+    started = threading.Event()
+
+    def fetch():
+        calls.append(1)
+        started.set()
+        time.sleep(0.1)
+        return {"id": "1"}
+
+    with ThreadPoolExecutor(max_workers=5) as executor:
+        leader = executor.submit(flight.do, "/vacancies/1", fetch)
+        started.wait()
+        followers = [executor.submit(flight.do, "/vacancies/1", fetch) for _ in range(4)]
+        results = [leader.result()] + [future.result() for future in followers]
+    assert len(calls) == 1
+    assert all(result is results[0] for result in results)
+
+
+
+def test_async_single_flight_cancel():
+    flight = AsyncSingleFlight()
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return {"id": "1"}
+
+    async def run():
+        leader = asyncio.ensure_future(flight.do("/vacancies/1", fetch))
+        await asyncio.sleep(0)
+        follower = asyncio.ensure_future(flight.do("/vacancies/1", fetch))
+        await asyncio.sleep(0)
+        leader.cancel()
+        assert await follower == {"id": "1"}
+        assert leader.cancelled()
+
+    asyncio.run(run())
+    assert len(calls) == 1
+
+def test_response_cache(tmp_path):
+    assert endpoint_name("/vacancies/52276391") == "vacancies/{id}"
+    assert endpoint_name("/vacancies?text=python") == "vacancies"
+    cache = ResponseCache(path=str(tmp_path / "cache.db"), memory_size=1)
+    cache.store("/vacancies/1", {"id": "1"}, etag='"a"')
+    cache.store("/vacancies/2", {"id": "2"})
+    cache.store("/me", {"is_admin": False})
+    entry, fresh = cache.lookup("/vacancies/1")
+    assert fresh and entry.data == {"id": "1"} and entry.etag == '"a"'
+    assert cache.lookup("/me") == (None, False)
+    assert cache.stats()["evictions"] == 2
+    cache.close()
+    cache = ResponseCache(path=str(tmp_path / "cache.db"), ttl={"vacancies/{id}": 0})
+    entry, fresh = cache.lookup("/vacancies/2")
+    assert not fresh and entry.data == {"id": "2"}
+    assert cache.refresh("/vacancies/2", entry).stored_at >= entry.stored_at
+    assert cache.stats()["stale"] == 1 and cache.stats()["revalidated"] == 1
+
+
+@pytest.fixture
+def fake_hh():
+    with FakeHHServer(found=300, missing_ids=["50000007"], seed=0) as fake:
+        yield fake
+
+
+def test_fake_server_client(fake_hh):
+    client = HHClient(Config(base_url=fake_hh.base_url, token="test", backoff_factor=0))
+    assert client.get_me().auth_type
+    vacancies = client.get_short_vacancies(VacancySearchParamsHHSchema(text="python"), limit=250)
+    assert len({vacancy.id for vacancy in vacancies}) == 250
+    results = list(client.get_vacancies([fake_hh.vacancy_id(index) for index in range(5, 10)]))
+    missing = [result for result in results if result.vacancy is None]
+    assert [result.id for result in missing] == ["50000007"]
+    assert isinstance(missing[0].error, HHError) and missing[0].error.status_code == 404
+    client.close()
+
+
+def test_fake_server_async_client(fake_hh):
+    conf = Config(base_url=fake_hh.base_url, token="test", backoff_factor=0)
+
+    async def run():
+        async with AsyncHH(conf) as client:
+            assert (await client.get_me()).auth_type
+            vacancies = await client.get_short_vacancies(VacancySearchParamsHHSchema(text="python", page=1, per_page=50), limit=200)
+            assert [vacancy.id for vacancy in vacancies] == [fake_hh.vacancy_id(index) for index in range(50, 250)]
+            results = [result async for result in client.get_vacancies([fake_hh.vacancy_id(index) for index in range(5, 10)], ordered=True)]
+            assert [result.id for result in results] == [fake_hh.vacancy_id(index) for index in range(5, 10)]
+            assert isinstance(results[2].error, HHError) and results[2].error.status_code == 404
+            window = VacancySearchParamsHHSchema(date_from=fake_hh.published_at(299), date_to=fake_hh.published_at(0))
+            harvested = [vacancy async for vacancy in client.harvest_vacancies(window)]
+            assert len({vacancy.id for vacancy in harvested}) == 300
+            requests_before = fake_hh.requests
+            enriched = [vacancy async for vacancy in client.enrich_employers(aiter_items(harvested), chunk_size=64)]
+            assert fake_hh.requests - requests_before == fake_hh.employers
+            assert [vacancy.id for vacancy in enriched] == [vacancy.id for vacancy in harvested]
+            assert all(isinstance(vacancy.employer, EmployerHHSchema) for vacancy in enriched)
+
+    asyncio.run(run())
+
+
+def test_fake_server_async_retry():
+    with FakeHHServer(found=10, throttle_rate=0.3, error_rate=0.2, seed=1) as fake:
+        conf = Config(base_url=fake.base_url, token="test", backoff_factor=0, max_retries=10, rate_limit=1000)
+
+        async def run():
+            async with AsyncHH(conf) as client:
+                vacancies = await asyncio.gather(*[client.get_vacancy(fake.vacancy_id(index)) for index in range(10)])
+                assert [vacancy.id for vacancy in vacancies] == [fake.vacancy_id(index) for index in range(10)]
+                assert client.limiter.in_flight == 0 and client.limiter.throttled > 0
+
+        asyncio.run(run())
+        assert fake.requests > 10
+
+    with FakeHHServer(found=10, throttle_rate=1.0) as fake:
+        conf = Config(base_url=fake.base_url, token="test", backoff_factor=0, max_retries=2)
+
+        async def give_up():
+            async with AsyncHH(conf) as client:
+                with pytest.raises(HHError) as error:
+                    await client.get_vacancy(fake.vacancy_id(0))
+                assert error.value.status_code == 429
+
+        asyncio.run(give_up())
+        assert fake.requests == 3
+
+
+def test_short_vacancies_from_page(fake_hh):
+    client = HHClient(Config(base_url=fake_hh.base_url, token="test"))
+    ids = lambda vacancies: [vacancy.id for vacancy in vacancies]
+    assert ids(client.get_short_vacancies(VacancySearchParamsHHSchema(page=3))) == [fake_hh.vacancy_id(index) for index in range(60, 80)]
+    vacancies = client.get_short_vacancies(VacancySearchParamsHHSchema(page=2, per_page=30), limit=100)
+    assert ids(vacancies) == [fake_hh.vacancy_id(index) for index in range(60, 160)]
+    assert len(client.get_short_vacancies(VacancySearchParamsHHSchema(page=14, per_page=20), limit=100)) == 20
+    client.close()
+
+
+def test_fake_server_retry():
+    with FakeHHServer(found=10, throttle_rate=0.5, seed=1) as fake:
+        client = HHClient(Config(base_url=fake.base_url, token="test", backoff_factor=0, max_retries=10))
+        assert [client.get_vacancy(fake.vacancy_id(index)).id for index in range(5)] == [fake.vacancy_id(index) for index in range(5)]
+        assert fake.requests > 5
+        client.close()
+
+
+
+def test_fake_server_rate_limited_retry():
+    with FakeHHServer(found=10, throttle_rate=0.3, error_rate=0.2, seed=1) as fake:
+        client = HHClient(Config(base_url=fake.base_url, token="test", backoff_factor=0, max_retries=10, rate_limit=1000))
+        acquired = []
+        acquire = client.limiter.acquire
+        client.limiter.acquire = lambda: acquired.append(1) or acquire()
+        results = list(client.get_vacancies([fake.vacancy_id(index) for index in range(10)]))
+        assert all(result.vacancy is not None for result in results)
+        assert len(acquired) == fake.requests > 10
+        assert client.limiter.in_flight == 0 and client.limiter.throttled > 0
+        client.close()
+
+def test_metrics(fake_hh):
+    assert HHClient(Config(base_url=fake_hh.base_url, token="test")).metrics is None
+    conf = Config(base_url=fake_hh.base_url, token="test", metrics_enabled=True)
+    events = []
+    get_metrics(conf).add_hook(events.append)
+    client = HHClient(conf)
+    client.get_vacancy(fake_hh.vacancy_id(0))
+    with pytest.raises(HHError):
+        client.get_vacancy("50000007")
+    request, parse = events[:2]
+    assert request.endpoint == "vacancies/{id}" and request.status_code == 200
+    assert request.connect > 0 and request.ttfb <= request.total and request.bytes > 0 and request.json is not None
+    assert parse.schema == "VacancyHHSchema" and parse.seconds > 0
+    metrics = get_metrics(conf)
+    assert metrics.histogram("hh_request_seconds", "vacancies/{id}").count == 2
+    assert metrics.responses == {("vacancies/{id}", "200"): 1, ("vacancies/{id}", "404"): 1}
+    assert 'hh_parse_seconds_count{endpoint="vacancies/{id}"} 1' in metrics.render()
+    client.close()
+
+    async def fetch():
+        async with AsyncHH(conf) as async_client:
+            return await async_client.get_vacancy(fake_hh.vacancy_id(1))
+
+    asyncio.run(fetch())
+    assert events[-2].connect is not None and events[-2].status_code == 200
+    assert metrics.histogram("hh_request_seconds", "vacancies/{id}").count == 3
+
+
+def test_enrich_employers(fake_hh):
+    client = HHClient(Config(base_url=fake_hh.base_url, token="test"))
+    vacancies = client.get_short_vacancies(VacancySearchParamsHHSchema(text="python"), limit=300)
+    requests_before = fake_hh.requests
+    enriched = list(client.enrich_employers(vacancies, chunk_size=64))
+    assert fake_hh.requests - requests_before == fake_hh.employers
+    assert [vacancy.id for vacancy in enriched] == [vacancy.id for vacancy in vacancies]
+    assert all(isinstance(vacancy.employer, EmployerHHSchema) for vacancy in enriched)
+    assert not any(isinstance(vacancy.employer, EmployerHHSchema) for vacancy in vacancies)
+    assert EnrichedVacancyHHSchema.parse_raw(enriched[0].json()) == enriched[0]
+    assert enriched[0].employer.industries
+    client.close()
+
+
+def test_bench(fake_hh):
+    results, parse_times = bench.run(vacancies=200, details=20, workers=4, memory=False, fake=fake_hh)
+    assert [result.name for result in results] == ["search", "pagination", "bulk_details"]
+    assert all(result.requests > 0 and result.latencies for result in results)
+    assert results[2].items == 19
+    assert set(parse_times) == set(PARSE_MODES)
+
+
 @pytest.mark.skipif(condition=conf.test_offline, reason="offline mode")
 @pytest.mark.dependency(depends=['test_search_params_schema'])
 def test_get_vacancy_list(hh_headers, hh_search_params_schema):
@@ -94,19 +592,15 @@ def test_get_similar_vacancies(hh_headers):
 
 
 @pytest.mark.skipif(condition=conf.test_offline, reason="offline mode")
-def test_get_employer_list(hh_headers):
-    # TODO: get_employer_list
-    response = requests.get(f"{base_url}/employers?per_page=100", headers=hh_headers)
-    assert response.status_code == 200
-    json_dict = response.json()
-    assert ShortEmployerListHHSchema.parse_obj(json_dict)
+def test_get_employer_list(hh_config):
+    employers = hh.get_hh_employers_obj(EmployerSearchParamsHHSchema(text="яндекс", per_page=100), conf=hh_config)
+    assert isinstance(employers, ShortEmployerListHHSchema)
+    assert employers.found > 0
 
 
 @pytest.mark.skipif(condition=conf.test_offline, reason="offline mode")
-def test_get_employer(hh_headers):
-    # TODO: get_employer
-    employer_id = 36227
-    response = requests.get(f"{base_url}/employers/{employer_id}", headers=hh_headers)
-    assert response.status_code == 200
-    json_dict = response.json()
-    assert EmployerHHSchema.parse_obj(json_dict)
+def test_get_employer(hh_config):
+    employer_id = "36227"
+    employer = hh.get_hh_employer(employer_id, conf=hh_config)
+    assert isinstance(employer, EmployerHHSchema)
+    assert employer.id == employer_id
@@ -0,0 +1,204 @@
+import bisect
+import threading
+import time
+from typing import Callable, NamedTuple, Optional, Union
+
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+from .config import Config
+
+TIME_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+# метрика запроса -> (имя гистограммы, границы корзин)
+REQUEST_HISTOGRAMS = {
+    "dns": ("hh_request_dns_seconds", TIME_BUCKETS),
+    "connect": ("hh_request_connect_seconds", TIME_BUCKETS),
+    "ttfb": ("hh_request_ttfb_seconds", TIME_BUCKETS),
+    "total": ("hh_request_seconds", TIME_BUCKETS),
+    "bytes": ("hh_response_bytes", SIZE_BUCKETS),
+    "json": ("hh_json_decode_seconds", TIME_BUCKETS)
+}
+
+
+class RequestMetrics(NamedTuple):
+    """ Замеры одного HTTP-запроса к эндпоинту endpoint (см. cache.endpoint_name), секунды и байты.
+    connect - установка новых соединений вместе с разрешением имени и TLS (None, если соединение
+    взято из пула), dns отдельно замеряет только асинхронный клиент. ttfb - от отправки запроса до
+    заголовков ответа, total - весь запрос с ожиданием ограничителя, повторами и чтением тела.
+    status_code равен None, если запрос завершился исключением.
+    """
+    endpoint: str
+    status_code: Optional[int]
+    total: float
+    ttfb: Optional[float] = None
+    dns: Optional[float] = None
+    connect: Optional[float] = None
+    bytes: Optional[int] = None
+    json: Optional[float] = None
+    retries: int = 0
+
+
+class ParseMetrics(NamedTuple):
+    """ Время разбора ответа эндпоинта в схему schema через parsing.parse_model, секунды. """
+    endpoint: str
+    schema: str
+    seconds: float
+
+
+class Histogram:
+    """ Гистограмма с фиксированными границами корзин, как histogram в Prometheus. """
+
+    def __init__(self, buckets: tuple):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def cumulative(self) -> list[tuple[float, int]]:
+        """ Пары (верхняя граница, количество значений не больше неё), последняя граница - inf. """
+        total = 0
+        pairs = []
+        for bound, count in zip((*self.buckets, float("inf")), self.counts):
+            total += count
+            pairs.append((bound, total))
+        return pairs
+
+    def quantile(self, q: float) -> float:
+        """ Оценка квантиля q (от 0 до 1) - верхняя граница корзины, в которую он попадает. """
+        if self.count == 0:
+            return 0.0
+        for bound, total in self.cumulative():
+            if total >= q * self.count:
+                return bound if bound != float("inf") else self.buckets[-1]
+        return self.buckets[-1]
+
+
+class Metrics:
+    """ Реестр метрик запросов к api.hh.ru: гистограммы по эндпоинтам, счётчики ответов по кодам
+    и повторов. Каждый замер передаётся также в hooks - функции, принимающие RequestMetrics или
+    ParseMetrics. render() отдаёт всё в текстовом формате Prometheus.
+    """
+
+    def __init__(self, hooks: tuple[Callable[[Union[RequestMetrics, ParseMetrics]], None], ...] = ()):
+        self.hooks = list(hooks)
+        self.histograms: dict[tuple[str, str], Histogram] = {}
+        self.responses: dict[tuple[str, str], int] = {}
+        self.retries: dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def add_hook(self, hook: Callable[[Union[RequestMetrics, ParseMetrics]], None]):
+        self.hooks.append(hook)
+
+    def _observe(self, name: str, buckets: tuple, endpoint: str, value: float):
+        histogram = self.histograms.get((name, endpoint))
+        if histogram is None:
+            histogram = self.histograms[(name, endpoint)] = Histogram(buckets)
+        histogram.observe(value)
+
+    def record_request(self, metrics: RequestMetrics):
+        with self._lock:
+            for field, (name, buckets) in REQUEST_HISTOGRAMS.items():
+                value = getattr(metrics, field)
+                if value is not None:
+                    self._observe(name, buckets, metrics.endpoint, value)
+            status = "error" if metrics.status_code is None else str(metrics.status_code)
+            self.responses[(metrics.endpoint, status)] = self.responses.get((metrics.endpoint, status), 0) + 1
+            self.retries[metrics.endpoint] = self.retries.get(metrics.endpoint, 0) + metrics.retries
+        for hook in self.hooks:
+            hook(metrics)
+
+    def record_parse(self, metrics: ParseMetrics):
+        with self._lock:
+            self._observe("hh_parse_seconds", TIME_BUCKETS, metrics.endpoint, metrics.seconds)
+        for hook in self.hooks:
+            hook(metrics)
+
+    def histogram(self, name: str, endpoint: str) -> Optional[Histogram]:
+        return self.histograms.get((name, endpoint))
+
+    def render(self) -> str:
+        """ Метрики в текстовом формате Prometheus для отдачи по /metrics. """
+        lines = []
+        with self._lock:
+            for name in sorted({name for name, _ in self.histograms}):
+                lines.append(f"# TYPE {name} histogram")
+                for (histogram_name, endpoint), histogram in sorted(self.histograms.items()):
+                    if histogram_name != name:
+                        continue
+                    for bound, total in histogram.cumulative():
+                        le = "+Inf" if bound == float("inf") else repr(bound)
+                        lines.append(f'{name}_bucket{{endpoint="{endpoint}",le="{le}"}} {total}')
+                    lines.append(f'{name}_sum{{endpoint="{endpoint}"}} {histogram.sum}')
+                    lines.append(f'{name}_count{{endpoint="{endpoint}"}} {histogram.count}')
+            lines.append("# TYPE hh_responses_total counter")
+            for (endpoint, status), count in sorted(self.responses.items()):
+                lines.append(f'hh_responses_total{{endpoint="{endpoint}",status="{status}"}} {count}')
+            lines.append("# TYPE hh_retries_total counter")
+            for endpoint, count in sorted(self.retries.items()):
+                lines.append(f'hh_retries_total{{endpoint="{endpoint}"}} {count}')
+        return "\n".join(lines) + "\n"
+
+
+_connect = threading.local()
+
+
+def start_connect_timer():
+    _connect.seconds = None
+
+
+def connect_seconds() -> Optional[float]:
+    """ Время установки соединений в текущем потоке с последнего start_connect_timer. """
+    return getattr(_connect, "seconds", None)
+
+
+class _TimedConnectionMixin:
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            super().connect()
+        finally:
+            _connect.seconds = (connect_seconds() or 0.0) + time.perf_counter() - start
+
+
+class TimedHTTPConnection(_TimedConnectionMixin, HTTPConnection):
+    pass
+
+
+class TimedHTTPSConnection(_TimedConnectionMixin, HTTPSConnection):
+    pass
+
+
+class TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = TimedHTTPConnection
+
+
+class TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = TimedHTTPSConnection
+
+
+class TimedHTTPAdapter(HTTPAdapter):
+    """ HTTPAdapter, соединения которого засекают время connect (DNS, TCP и TLS) в connect_seconds(). """
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {"http": TimedHTTPConnectionPool, "https": TimedHTTPSConnectionPool}
+
+
+_metrics_lock = threading.Lock()
+
+
+def get_metrics(conf: Config) -> Optional[Metrics]:
+    """ Реестр метрик, закреплённый за конфигом, или None, если metrics_enabled выключен. """
+    if not conf.metrics_enabled:
+        return None
+    with _metrics_lock:
+        if conf._metrics is None:
+            conf._metrics = Metrics()
+        return conf._metrics
@@ -0,0 +1,153 @@
+from datetime import date, datetime
+from functools import lru_cache
+from typing import Type, TypeVar
+
+from pydantic import BaseModel, PrivateAttr, ValidationError
+from pydantic.datetime_parse import parse_date, parse_datetime
+from pydantic.error_wrappers import ErrorWrapper
+from pydantic.errors import MissingError
+from pydantic.fields import ModelField, SHAPE_LIST, SHAPE_SINGLETON
+
+Model = TypeVar("Model", bound=BaseModel)
+
+PARSE_MODES = ("validate", "construct", "lazy")
+
+
+def parse_model(cls: Type[Model], data: dict, mode="validate") -> Model:
+    """ Создаёт модель из ответа api.hh.ru одним из способов:
+    validate - полная валидация pydantic (parse_obj);
+    construct - без валидации, вложенные модели и даты всё равно приводятся к своим типам;
+    lazy - простые поля валидируются сразу, вложенные модели - при первом обращении к ним.
+    """
+    if mode == "validate":
+        return cls.parse_obj(data)
+    if mode == "construct":
+        return construct_model(cls, data)
+    if mode == "lazy":
+        return lazy_model(cls, data)
+    raise ValueError(f"Неизвестный режим разбора {mode}, допустимы: {', '.join(PARSE_MODES)}")
+
+
+def model_type(field: ModelField):
+    """ Класс вложенной модели для полей вида Model, Optional[Model] и list[Model], иначе None. """
+    if field.shape in (SHAPE_SINGLETON, SHAPE_LIST) and isinstance(field.type_, type) and issubclass(field.type_, BaseModel):
+        return field.type_
+    return None
+
+
+@lru_cache(maxsize=None)
+def _construct_plan(cls: Type[BaseModel]) -> list:
+    plan = []
+    for name, field in cls.__fields__.items():
+        nested = model_type(field)
+        if nested is not None and field.shape == SHAPE_LIST:
+            convert = lambda value, nested=nested: [construct_model(nested, item) for item in value]
+        elif nested is not None:
+            convert = lambda value, nested=nested: construct_model(nested, value)
+        elif field.type_ is datetime:
+            convert = parse_datetime
+        elif field.type_ is date:
+            convert = parse_date
+        else:
+            convert = None
+        plan.append((name, field.alias, convert, field))
+    return plan
+
+
+def construct_model(cls: Type[Model], data: dict) -> Model:
+    if not isinstance(data, dict):
+        return data
+    values = {}
+    fields_set = set()
+    for name, alias, convert, field in _construct_plan(cls):
+        if alias in data:
+            value = data[alias]
+            values[name] = value if value is None or convert is None else convert(value)
+            fields_set.add(name)
+        else:
+            values[name] = field.get_default()
+    return _new_model(cls, values, fields_set)
+
+
+def _new_model(cls: Type[Model], values: dict, fields_set: set) -> Model:
+    """ То же, что BaseModel.construct, но без повторного обхода полей. """
+    obj = cls.__new__(cls)
+    object.__setattr__(obj, "__dict__", values)
+    object.__setattr__(obj, "__fields_set__", fields_set)
+    obj._init_private_attributes()
+    return obj
+
+
+class LazyModelMixin(BaseModel):
+    """ Вложенные модели хранятся в _lazy_raw как пришли из API и разбираются при первом обращении.
+    dict(), json() и сравнение предварительно разбирают все отложенные поля, pickle сохраняет
+    модель разобранной целиком как экземпляр исходной схемы.
+    """
+    _lazy_raw: dict = PrivateAttr(default_factory=dict)
+
+    def __getattr__(self, name: str):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        raw = self._lazy_raw
+        if name not in raw:
+            raise AttributeError(name)
+        field = self.__fields__[name]
+        value = raw[name]
+        nested = model_type(field)
+        if value is None:
+            pass
+        elif field.shape == SHAPE_LIST:
+            value = [lazy_model(nested, item) for item in value]
+        else:
+            value = lazy_model(nested, value)
+        self.__dict__[name] = value
+        return value
+
+    def _materialize(self):
+        for name in self._lazy_raw:
+            if name not in self.__dict__:
+                getattr(self, name)
+
+    def _iter(self, *args, **kwargs):
+        self._materialize()
+        return super()._iter(*args, **kwargs)
+
+    def __reduce__(self):
+        self._materialize()
+        base = type(self).__bases__[1]
+        return _new_model, (base, dict(self.__dict__), set(self.__fields_set__))
+
+
+@lru_cache(maxsize=None)
+def lazy_class(cls: Type[Model]) -> Type[Model]:
+    """ Подкласс модели с ленивым разбором вложенных моделей, isinstance(obj, cls) сохраняется. """
+    return type(cls)(cls.__name__, (LazyModelMixin, cls), {"__module__": cls.__module__, "__qualname__": cls.__qualname__})
+
+
+def lazy_model(cls: Type[Model], data: dict) -> Model:
+    if not isinstance(data, dict):
+        return cls.validate(data)
+    values = {}
+    raw = {}
+    fields_set = set()
+    errors = []
+    for name, field in cls.__fields__.items():
+        if field.alias not in data:
+            if field.required:
+                errors.append(ErrorWrapper(MissingError(), loc=field.alias))
+            else:
+                values[name] = field.get_default()
+            continue
+        fields_set.add(name)
+        value = data[field.alias]
+        if model_type(field) is not None:
+            raw[name] = value
+            continue
+        values[name], error = field.validate(value, values, loc=field.alias, cls=cls)
+        if error:
+            errors.append(error)
+    if errors:
+        raise ValidationError(errors, cls)
+    obj = _new_model(lazy_class(cls), values, fields_set)
+    obj._lazy_raw = raw
+    return obj
@@ -0,0 +1,157 @@
+import asyncio
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Optional
+
+from .config import Config
+
+THROTTLE_STATUSES = (429, 503)
+POLL_INTERVAL = 0.01
+
+
+def file_lock_module():
+    """ fcntl для общего между процессами состояния ограничителя; есть только на POSIX-системах. """
+    try:
+        import fcntl
+    except ImportError:
+        raise ValueError("rate_limit_path не поддерживается на этой платформе: нет модуля fcntl")
+    return fcntl
+
+
+class RateLimiter:
+    """ Ограничитель запросов к api.hh.ru: token bucket на rate запросов в секунду (с запасом burst)
+    и предел одновременных запросов, который подстраивается по AIMD - при ответах 429/503 делится
+    на decrease (не чаще раза в cooldown секунд), при успешных ответах растёт примерно на единицу
+    за каждые limit запросов.
+
+    Без path состояние общее для потоков процесса. С path ведро токенов и текущий предел хранятся
+    в файле под блокировкой fcntl и делятся всеми процессами, работающими с одним токеном;
+    одновременные запросы при этом считаются в каждом процессе отдельно.
+    """
+
+    def __init__(self, rate: float, burst: Optional[int] = None, max_concurrency=20, min_concurrency=1,
+                 decrease=0.5, cooldown=1.0, path: Optional[str] = None):
+        self.rate = rate
+        self.burst = burst or max(1, int(rate))
+        self.max_concurrency = max_concurrency
+        self.min_concurrency = min_concurrency
+        self.decrease = decrease
+        self.cooldown = cooldown
+        self.path = path
+        if path is not None:
+            file_lock_module()
+        self.in_flight = 0
+        self.throttled = 0
+        self._lock = threading.Lock()
+        self._memory = self._initial_state()
+
+    def _initial_state(self) -> dict:
+        return {"tokens": float(self.burst), "updated_at": time.time(), "limit": float(self.max_concurrency), "decreased_at": 0.0}
+
+    @contextmanager
+    def _state(self):
+        with self._lock:
+            if self.path is None:
+                yield self._memory
+                return
+            fcntl = file_lock_module()
+            fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX)
+                raw = os.read(fd, 4096)
+                state = json.loads(raw) if raw else self._initial_state()
+                yield state
+                data = json.dumps(state).encode()
+                os.lseek(fd, 0, os.SEEK_SET)
+                os.ftruncate(fd, 0)
+                os.write(fd, data)
+            finally:
+                os.close(fd)
+
+    @property
+    def limit(self) -> float:
+        with self._state() as state:
+            return state["limit"]
+
+    def try_acquire(self) -> float:
+        """ Занимает слот и токен и возвращает 0, либо возвращает, сколько секунд подождать до новой попытки. """
+        with self._state() as state:
+            now = time.time()
+            state["tokens"] = min(self.burst, state["tokens"] + (now - state["updated_at"]) * self.rate)
+            state["updated_at"] = now
+            if self.in_flight >= int(state["limit"]):
+                return POLL_INTERVAL
+            if state["tokens"] < 1:
+                return (1 - state["tokens"]) / self.rate
+            state["tokens"] -= 1
+            self.in_flight += 1
+            return 0
+
+    def acquire(self):
+        while (delay := self.try_acquire()) > 0:
+            time.sleep(delay)
+
+    async def acquire_async(self):
+        """ Асинхронный acquire. Блокировку файла path ждёт в пуле потоков, а не в event loop. """
+        if self.path is None:
+            while (delay := self.try_acquire()) > 0:
+                await asyncio.sleep(delay)
+            return
+        loop = asyncio.get_running_loop()
+        while True:
+            attempt = loop.run_in_executor(None, self.try_acquire)
+            try:
+                delay = await asyncio.shield(attempt)
+            except asyncio.CancelledError:
+                attempt.add_done_callback(self._release_acquired)
+                raise
+            if delay <= 0:
+                return
+            await asyncio.sleep(delay)
+
+    def _release_acquired(self, attempt: asyncio.Future):
+        # слот, занятый попыткой, ожидание которой уже отменено, никто не освободит
+        if not attempt.cancelled() and attempt.exception() is None and attempt.result() == 0:
+            self.release()
+
+    def release(self, status_code: Optional[int] = None):
+        """ Освобождает слот; по коду ответа подстраивает предел одновременных запросов. """
+        with self._state() as state:
+            self.in_flight -= 1
+            self._feedback(state, status_code)
+
+    def observe(self, status_code: int):
+        """ Учитывает ответ на запрос, не занимавший слот ограничителя. """
+        with self._state() as state:
+            self._feedback(state, status_code)
+
+    def _feedback(self, state: dict, status_code: Optional[int]):
+        if status_code in THROTTLE_STATUSES:
+            self.throttled += 1
+            now = time.time()
+            if now - state["decreased_at"] >= self.cooldown:
+                state["limit"] = max(self.min_concurrency, state["limit"] * self.decrease)
+                state["decreased_at"] = now
+        elif status_code is not None and status_code < 500:
+            state["limit"] = min(self.max_concurrency, state["limit"] + 1 / state["limit"])
+
+
+_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter(conf: Config) -> Optional[RateLimiter]:
+    """ Ограничитель, закреплённый за конфигом, или None, если rate_limit не задан. """
+    if conf.rate_limit is None:
+        return None
+    with _limiter_lock:
+        if conf._rate_limiter is None:
+            conf._rate_limiter = RateLimiter(
+                rate=conf.rate_limit,
+                burst=conf.rate_limit_burst,
+                max_concurrency=conf.max_concurrency,
+                path=conf.rate_limit_path
+            )
+        return conf._rate_limiter
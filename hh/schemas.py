@@ -1,4 +1,6 @@
+import hashlib
 from typing import Optional, Union
+from urllib.parse import quote, urlencode
 from pydantic import BaseModel, Field, HttpUrl, conint
 from libs import HTML
 from datetime import datetime, date
@@ -33,6 +35,10 @@ class SalaryHHSchema(BaseModel):
     gross: Optional[bool] = Field(description="Признак того что оклад указан до вычета налогов. В случае если не указано - null.")
     currency: str = Field(description="Идентификатор валюты оклада (справочник currency). https://github.com/hhru/api/blob/master/docs/dictionaries.md")
 
+    class Config:
+        # чтобы модель, сохранённая через .json() без by_alias, читалась обратно
+        allow_population_by_field_name = True
+
 
 class MetroStationsHHSchema(BaseModel):
     station_id: str = Field(description="Идентификатор станции метро", example="6.8")
@@ -89,6 +95,10 @@ class LogoUrlsHHSchema(BaseModel):
     image_240: HttpUrl = Field(alias="240")
     image_90: HttpUrl = Field(alias="90")
 
+    class Config:
+        # чтобы модель, сохранённая через .json() без by_alias, читалась обратно
+        allow_population_by_field_name = True
+
 
 class ShortEmployerHHSchema(BaseModel):
     id: str = Field(description="идентификатор работодателя")
@@ -156,7 +166,30 @@ class VacancyHHSchema(ShortVacancyHHSchema):
     vacancy_constructor_template: Optional[dict]
 
 
-class VacancySearchParamsHHSchema(BaseModel):
+class SearchParamsHHSchema(BaseModel):
+    """ Параметры поискового запроса, которые передаются в строке запроса. """
+
+    def get_query(self) -> list[tuple[str, str]]:
+        """ Параметры запроса в каноническом виде: по имени параметра, множественные значения
+        отсортированы, логические значения в виде true/false, даты в формате ISO 8601.
+        """
+        query = []
+        for prop, value in sorted(vars(self).items()):
+            if value is None:
+                continue
+            values = value if type(value) is list else [value]
+            query += [(prop, v) for v in sorted(format_param(v) for v in values)]
+        return query
+
+    def get_params(self) -> str:
+        return "?" + urlencode(self.get_query(), quote_via=quote)
+
+    def fingerprint(self) -> str:
+        """ Отпечаток поиска: одинаков для равных наборов параметров, в каком бы порядке они ни были заданы. """
+        return hashlib.sha1(self.get_params().encode()).hexdigest()
+
+
+class VacancySearchParamsHHSchema(SearchParamsHHSchema):
     """ При указании параметров пагинации (page, per_page) работает ограничение: глубина возвращаемых
     результатов не может быть больше 2000. Например, возможен запрос per_page=10&page=199
     (выдача с 1991 по 2000 вакансию), но запрос с per_page=10&page=200 вернёт ошибку (выдача с 2001 до 2010 вакансию).
@@ -176,8 +209,8 @@ class VacancySearchParamsHHSchema(BaseModel):
     label: Optional[Union[str, list[str]]] = Field(description="Необходимо передавать id из справочника vacancy_label в /dictionaries. Возможно указание нескольких значений.")
     only_with_salary: Optional[bool] = Field(description="показывать вакансии только с указанием зарплаты. Возможные значения: true или false. По умолчанию, используется false.")
     period: Optional[conint(ge=0, le=30)] = Field(description="количество дней, в пределах которых нужно найти вакансии. Максимальное значение: 30.")
-    date_from: Optional[date] = Field(description="дата, которая ограничивает снизу диапазон дат публикации вакансий. Нельзя передавать вместе с параметром period. Значение указывается в формате ISO 8601 - YYYY-MM-DD или с точность до секунды YYYY-MM-DDThh:mm:ss±hhmm. Указанное значение будет округлено до ближайших 5 минут.")
-    date_to: Optional[date] = Field(description="дата, которая ограничивает сверху диапазон дат публикации вакансий. Необходимо передавать только в паре с параметром date_from. Нельзя передавать вместе с параметром period. Значение указывается в формате ISO 8601 - YYYY-MM-DD или с точность до секунды YYYY-MM-DDThh:mm:ss±hhmm. Указанное значение будет округлено до ближайших 5 минут.")
+    date_from: Optional[Union[datetime, date]] = Field(description="дата, которая ограничивает снизу диапазон дат публикации вакансий. Нельзя передавать вместе с параметром period. Значение указывается в формате ISO 8601 - YYYY-MM-DD или с точность до секунды YYYY-MM-DDThh:mm:ss±hhmm. Указанное значение будет округлено до ближайших 5 минут.")
+    date_to: Optional[Union[datetime, date]] = Field(description="дата, которая ограничивает сверху диапазон дат публикации вакансий. Необходимо передавать только в паре с параметром date_from. Нельзя передавать вместе с параметром period. Значение указывается в формате ISO 8601 - YYYY-MM-DD или с точность до секунды YYYY-MM-DDThh:mm:ss±hhmm. Указанное значение будет округлено до ближайших 5 минут.")
     top_lat: Optional[float] = Field(description="top_lat, bottom_lat, left_lng, right_lng — значение гео-координат. При поиске используется значение указанного в вакансии адреса. Принимаемое значение — градусы в виде десятичной дроби. Необходимо передавать одновременно все четыре параметра гео-координат, иначе вернется ошибка.")
     bottom_lat: Optional[float] = Field(description="top_lat, bottom_lat, left_lng, right_lng — значение гео-координат. При поиске используется значение указанного в вакансии адреса. Принимаемое значение — градусы в виде десятичной дроби. Необходимо передавать одновременно все четыре параметра гео-координат, иначе вернется ошибка.")
     left_lng: Optional[float] = Field(description="top_lat, bottom_lat, left_lng, right_lng — значение гео-координат. При поиске используется значение указанного в вакансии адреса. Принимаемое значение — градусы в виде десятичной дроби. Необходимо передавать одновременно все четыре параметра гео-координат, иначе вернется ошибка.")
@@ -196,17 +229,15 @@ class VacancySearchParamsHHSchema(BaseModel):
     part_time: Optional[Union[str, list[str]]] = Field(description="Вакансии для подработки. Возможные значения: все элементы из working_days в /dictionaries. все элементы из working_time_intervals в /dictionaries. все элементы из working_time_modes в /dictionaries. элементы part или project из employment в /dictionaries. элемент accept_temporary, показывает вакансии только с временным трудоустройством. Возможно указание нескольких значений.")
     professional_role: Optional[Union[str, list[str]]] = Field(description="профессиональная роль. Необходимо передавать id из справочника professional_roles. Возможно указание нескольких значений. Замена специализациям (параметр specialization)")
 
-    def get_params(self) -> str:
-        params: str = ""
-        for prop, value in vars(self).items():
-            if value is None:
-                continue
-            if type(value) is list:
-                for v in value:
-                    params += f"&{prop}={v}"
-            else:
-                params += f"&{prop}={value}"
-        return "?" + params[1:]
+
+def format_param(value) -> str:
+    if type(value) is bool:
+        return "true" if value else "false"
+    if type(value) is datetime:
+        return value.strftime("%Y-%m-%dT%H:%M:%S%z")
+    if type(value) is date:
+        return value.isoformat()
+    return str(value)
 
 
 class ShortVacancyListHHSchema(BaseModel):
@@ -238,3 +269,18 @@ class ShortEmployerListHHSchema(BaseModel):
     pages: int
     per_page: int
     page: int
+
+
+class EnrichedVacancyHHSchema(ShortVacancyHHSchema):
+    employer: Optional[Union[EmployerHHSchema, ShortEmployerHHSchema]] = Field(description="Полное описание работодателя. Короткое, если полное загрузить не удалось, и null для анонимной вакансии")
+
+
+class EmployerSearchParamsHHSchema(SearchParamsHHSchema):
+    """ Глубина выдачи поиска работодателей ограничена 5000 результатов. """
+    text: Optional[str] = Field(description="текст для поиска. Переданное значение ищется в названии и описании работодателя")
+    area: Optional[Union[str, list[str]]] = Field(description="идентификатор региона работодателя. Необходимо передавать id из справочника /areas. Возможно указание нескольких значений.")
+    type: Optional[str] = Field(description="тип работодателя. Необходимо передавать id из справочника employer_type в /dictionaries.")
+    only_with_vacancies: Optional[bool] = Field(description="возвращать только работодателей, у которых есть в данный момент открытые вакансии. По умолчанию - false.")
+    sort_by: Optional[str] = Field(description="сортировка: name - по названию, by_vacancies_open - по количеству открытых вакансий, by_vacancies_total - по количеству вакансий за всё время.")
+    per_page: Optional[conint(ge=0, le=100)] = Field(description="параметры пагинации. Параметр per_page ограничен значением в 100.")
+    page: Optional[conint(ge=0)] = Field(description="параметры пагинации. Параметр per_page ограничен значением в 100.")
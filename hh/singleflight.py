@@ -0,0 +1,58 @@
+import asyncio
+import threading
+from concurrent.futures import Future
+from typing import Awaitable, Callable, TypeVar
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """ Объединяет одновременные одинаковые вызовы: пока вызов с ключом key выполняется,
+    остальные вызовы с тем же ключом не повторяют его, а ждут и получают тот же результат или ошибку.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: dict[str, Future] = {}
+
+    def do(self, key: str, fn: Callable[[], T]) -> T:
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = self._calls[key] = Future()
+        if not leader:
+            return future.result()
+        try:
+            result = fn()
+            future.set_result(result)
+            return result
+        except BaseException as error:
+            future.set_exception(error)
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+
+
+class AsyncSingleFlight:
+    """ Асинхронный аналог SingleFlight для одного event loop. Вызов выполняется отдельной задачей,
+    поэтому отмена одного из ожидающих (в том числе первого) прерывает только его ожидание.
+    """
+
+    def __init__(self):
+        self._calls: dict[str, asyncio.Task] = {}
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[T]]) -> T:
+        task = self._calls.get(key)
+        if task is None:
+            task = self._calls[key] = asyncio.ensure_future(fn())
+            task.add_done_callback(lambda done: self._done(key, done))
+        return await asyncio.shield(task)
+
+    def _done(self, key: str, task: asyncio.Task):
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        if not task.cancelled():
+            # ошибку могли не забрать, если все ожидающие отменены
+            task.exception()
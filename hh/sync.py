@@ -0,0 +1,86 @@
+import json
+import sqlite3
+import threading
+from datetime import datetime, timedelta
+from typing import Iterator, NamedTuple, Optional
+
+from .client import HHClient, VacancyResult
+from .schemas import VacancySearchParamsHHSchema, ShortVacancyHHSchema
+
+# api.hh.ru округляет date_from до 5 минут, поэтому окно начинается чуть раньше водяного знака
+SYNC_OVERLAP = timedelta(minutes=5)
+WINDOW_PARAMS = {"date_from": None, "date_to": None, "period": None, "page": None, "per_page": None}
+
+
+class Watermark(NamedTuple):
+    published_at: datetime
+    ids: frozenset
+
+
+def query_key(params: VacancySearchParamsHHSchema) -> str:
+    """ Ключ сохранённого поиска: отпечаток параметров без окна дат и пагинации. """
+    return params.copy(update=WINDOW_PARAMS).fingerprint()
+
+
+class VacancySync:
+    """ Инкрементальная синхронизация сохранённых поисков. Для каждого поиска хранится водяной знак:
+    максимальный published_at из уже отданных вакансий и id вакансий с этим published_at.
+    Следующий запуск запрашивает только окно с date_from от водяного знака и отдаёт вакансии,
+    опубликованные (или переопубликованные) после него.
+    """
+
+    def __init__(self, client: HHClient, path: str):
+        self.client = client
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS watermarks (query TEXT PRIMARY KEY, published_at TEXT NOT NULL, ids TEXT NOT NULL)"
+        )
+
+    def get_watermark(self, params: VacancySearchParamsHHSchema) -> Optional[Watermark]:
+        with self._lock:
+            row = self._db.execute("SELECT published_at, ids FROM watermarks WHERE query = ?", (query_key(params),)).fetchone()
+        if row is None:
+            return None
+        return Watermark(datetime.fromisoformat(row[0]), frozenset(json.loads(row[1])))
+
+    def set_watermark(self, params: VacancySearchParamsHHSchema, watermark: Watermark):
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO watermarks (query, published_at, ids) VALUES (?, ?, ?)",
+                (query_key(params), watermark.published_at.isoformat(), json.dumps(sorted(watermark.ids)))
+            )
+
+    def reset(self, params: VacancySearchParamsHHSchema):
+        with self._lock:
+            self._db.execute("DELETE FROM watermarks WHERE query = ?", (query_key(params),))
+
+    def close(self):
+        self._db.close()
+
+    def new_vacancies(self, params: VacancySearchParamsHHSchema) -> Iterator[ShortVacancyHHSchema]:
+        """ Новые и переопубликованные с прошлого запуска вакансии. Первый запуск отдаёт всю выдачу.
+        Водяной знак сохраняется, только когда поток прочитан до конца.
+        """
+        watermark = self.get_watermark(params)
+        query = params
+        if watermark is not None:
+            query = params.copy(update={"date_from": watermark.published_at - SYNC_OVERLAP, "date_to": None, "period": None})
+        latest_at = None if watermark is None else watermark.published_at
+        latest_ids = set() if watermark is None else set(watermark.ids)
+        for vacancy in self.client.harvest_vacancies(query):
+            if watermark is not None and (vacancy.published_at < watermark.published_at or
+                                          vacancy.published_at == watermark.published_at and vacancy.id in watermark.ids):
+                continue
+            if latest_at is None or vacancy.published_at > latest_at:
+                latest_at = vacancy.published_at
+                latest_ids = {vacancy.id}
+            elif vacancy.published_at == latest_at:
+                latest_ids.add(vacancy.id)
+            yield vacancy
+        if latest_at is not None:
+            self.set_watermark(params, Watermark(latest_at, frozenset(latest_ids)))
+
+    def new_vacancy_details(self, params: VacancySearchParamsHHSchema, workers: Optional[int] = None) -> Iterator[VacancyResult]:
+        """ Полные описания только для новых вакансий, см. new_vacancies и HHClient.get_vacancies. """
+        return self.client.get_vacancies((vacancy.id for vacancy in self.new_vacancies(params)), workers=workers)